@@ -0,0 +1,58 @@
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+}
+GROUP_FIELDS = {
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+    'posts_count': 'posts_count',
+}
+PROFILE_FIELDS = {
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'posts_count': 'profile__posts_count',
+}
+
+
+class InvalidFields(Exception):
+    pass
+
+
+def parse_fields(value, available):
+    """Return the field names asked for by a ``?fields=a,b`` parameter.
+
+    All fields are returned when the parameter is missing.
+    """
+    if value is None:
+        return tuple(available)
+    names = tuple(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()
+    ))
+    unknown = [name for name in names if name not in available]
+    if not names or unknown:
+        raise InvalidFields(
+            f'Неизвестные поля: {", ".join(unknown) or value!r}. '
+            f'Доступные поля: {", ".join(available)}.'
+        )
+    return names
+
+
+def select(queryset, fields, available, extra=()):
+    """Fetch only the columns behind ``fields`` (and ``extra``) as dicts.
+
+    Related fields are looked up through joins in the same query, and
+    no model instances are built.
+    """
+    lookups = dict.fromkeys([available[name] for name in fields])
+    lookups.update(dict.fromkeys(extra))
+    return queryset.values(*lookups)
+
+
+def serialize(row, fields, available):
+    return {name: row[available[name]] for name in fields}
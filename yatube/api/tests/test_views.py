@@ -0,0 +1,180 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class ApiViewsTest(TestCase):
+    NUM_POSTS = 25
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(
+            username='author_name', first_name='Лев', last_name='Толстой'
+        )
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group-slug',
+            description='Тестовое описание',
+        )
+
+        cls.posts = [
+            Post.objects.create(
+                text=f'Тестовый пост №{i + 1}',
+                author=cls.author,
+                group=cls.group if i % 2 else None,
+            )
+            for i in range(cls.NUM_POSTS)
+        ]
+
+    def setUp(self):
+        self.guest = Client()
+
+    def collect(self, url):
+        """Follow ``next`` links and return every result."""
+        results = []
+        while url:
+            response = self.guest.get(url)
+            self.assertEqual(response.status_code, 200)
+            results += response.json()['results']
+            url = response.json()['next']
+        return results
+
+    def test_posts_list(self):
+        response = self.guest.get(reverse('api:posts'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        data = response.json()
+        self.assertEqual(len(data['results']), 20)
+        self.assertIsNone(data['previous'])
+        self.assertEqual(data['results'][0], {
+            'id': self.posts[-1].pk,
+            'text': 'Тестовый пост №25',
+            'pub_date': data['results'][0]['pub_date'],
+            'updated': data['results'][0]['updated'],
+            'author': 'author_name',
+            'group': None,
+        })
+
+    def test_cursor_walks_all_posts(self):
+        results = self.collect(reverse('api:posts') + '?limit=7')
+        self.assertEqual(
+            [post['id'] for post in results],
+            [post.pk for post in reversed(self.posts)],
+        )
+
+    def test_previous_cursor(self):
+        first = self.guest.get(reverse('api:posts')).json()
+        second = self.guest.get(first['next']).json()
+        self.assertEqual(self.guest.get(second['previous']).json(), first)
+
+    def test_sparse_fields(self):
+        response = self.guest.get(
+            reverse('api:posts'), {'fields': 'id,author'}
+        )
+        for post in response.json()['results']:
+            self.assertEqual(set(post), {'id', 'author'})
+
+        response = self.guest.get(response.json()['next'])
+        self.assertEqual(
+            set(response.json()['results'][0]), {'id', 'author'}
+        )
+
+    def test_unknown_fields(self):
+        for fields in ('id,body', ',', 'password'):
+            with self.subTest(fields=fields):
+                response = self.guest.get(
+                    reverse('api:posts'), {'fields': fields}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('detail', response.json())
+
+    def test_filtered_posts(self):
+        table = {
+            reverse('api:group_posts', kwargs={'slug': 'group-slug'}): [
+                post.pk for post in reversed(self.posts) if post.group
+            ],
+            reverse(
+                'api:profile_posts', kwargs={'username': 'author_name'}
+            ): [post.pk for post in reversed(self.posts)],
+        }
+        for url, expected in table.items():
+            with self.subTest(url=url):
+                results = self.collect(url)
+                self.assertEqual([post['id'] for post in results], expected)
+
+    def test_details(self):
+        table = {
+            reverse('api:post_detail', kwargs={'post_id': self.posts[0].pk}):
+                ('text', 'Тестовый пост №1'),
+            reverse('api:group_detail', kwargs={'slug': 'group-slug'}):
+                ('posts_count', 12),
+            reverse('api:profile_detail', kwargs={'username': 'author_name'}):
+                ('posts_count', 25),
+        }
+        for url, (field, value) in table.items():
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()[field], value)
+
+    def test_groups_list(self):
+        response = self.guest.get(reverse('api:groups'))
+        self.assertEqual(response.json()['results'], [{
+            'slug': 'group-slug',
+            'title': 'Тестовая группа',
+            'description': 'Тестовое описание',
+            'posts_count': 12,
+        }])
+
+    def test_missing_objects(self):
+        urls = (
+            reverse('api:post_detail', kwargs={'post_id': 0}),
+            reverse('api:group_detail', kwargs={'slug': 'missing'}),
+            reverse('api:group_posts', kwargs={'slug': 'missing'}),
+            reverse('api:profile_detail', kwargs={'username': 'missing'}),
+            reverse('api:profile_posts', kwargs={'username': 'missing'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('detail', response.json())
+
+    def test_read_only(self):
+        response = self.guest.post(reverse('api:posts'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_one_query_per_page(self):
+        url = self.guest.get(reverse('api:posts')).json()['next']
+        with self.assertNumQueries(1):
+            self.guest.get(url)
+
+    @override_settings(QUERY_BUDGET_ENABLED=True)
+    def test_cursor_past_the_end_returns_empty_page(self):
+        url = self.guest.get(
+            reverse('api:posts'), {'limit': self.NUM_POSTS - 1}
+        ).json()['next']
+        Post.objects.filter(pk=self.posts[0].pk).delete()
+
+        with self.assertNumQueries(1):
+            response = self.guest.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+        self.assertIsNone(response.json()['next'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-a-cursor', 'eyJrIjpbMSwyXSwiYiI6MH0'):
+            with self.subTest(cursor=cursor):
+                response = self.guest.get(
+                    reverse('api:posts'), {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('detail', response.json())
@@ -0,0 +1,146 @@
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+
+from core.middleware.query_budget import query_budget
+from posts.models import Group, Post
+from posts.paginators import CursorPaginator, InvalidCursor
+
+from .serializers import (
+    GROUP_FIELDS, POST_FIELDS, PROFILE_FIELDS, InvalidFields, parse_fields,
+    select, serialize
+)
+
+User = get_user_model()
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+
+def api_response(data, status=200):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def api_error(status, detail):
+    return api_response({'detail': detail}, status=status)
+
+
+def api_view(view_func):
+    """Answer GET and HEAD only and report bad ``fields`` and cursors
+    as JSON."""
+    @require_safe
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except InvalidFields as error:
+            return api_error(400, str(error))
+        except InvalidCursor:
+            return api_error(400, 'Неверный курсор.')
+    return wrapper
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', API_PAGE_SIZE))
+    except ValueError:
+        return API_PAGE_SIZE
+    return min(max(size, 1), API_MAX_PAGE_SIZE)
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def paginated(request, queryset, available, ordering=('-pub_date', '-id')):
+    """Serialize one cursor page of ``queryset`` in a single query."""
+    fields = parse_fields(request.GET.get('fields'), available)
+    rows = select(
+        queryset, fields, available,
+        extra=[field.lstrip('-') for field in ordering],
+    )
+    paginator = CursorPaginator(
+        rows, page_size(request), ordering, strict=True
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    return api_response({
+        'results': [serialize(row, fields, available) for row in page],
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    })
+
+
+def detail(request, queryset, available):
+    fields = parse_fields(request.GET.get('fields'), available)
+    row = select(queryset, fields, available).first()
+    if row is None:
+        return api_error(404, 'Не найдено.')
+    return api_response(serialize(row, fields, available))
+
+
+@query_budget(1)
+@api_view
+def posts(request):
+    return paginated(request, Post.objects.all(), POST_FIELDS)
+
+
+@query_budget(1)
+@api_view
+def post_detail(request, post_id):
+    return detail(request, Post.objects.filter(pk=post_id), POST_FIELDS)
+
+
+@query_budget(1)
+@api_view
+def groups(request):
+    return paginated(
+        request, Group.objects.all(), GROUP_FIELDS, ordering=('title', 'id')
+    )
+
+
+@query_budget(1)
+@api_view
+def group_detail(request, slug):
+    return detail(request, Group.objects.filter(slug=slug), GROUP_FIELDS)
+
+
+@query_budget(2)
+@api_view
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return api_error(404, 'Не найдено.')
+    return paginated(
+        request, Post.objects.filter(group_id=group_id), POST_FIELDS
+    )
+
+
+@query_budget(1)
+@api_view
+def profile_detail(request, username):
+    return detail(
+        request, User.objects.filter(username=username), PROFILE_FIELDS
+    )
+
+
+@query_budget(2)
+@api_view
+def profile_posts(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return api_error(404, 'Не найдено.')
+    return paginated(
+        request, Post.objects.filter(author_id=author_id), POST_FIELDS
+    )
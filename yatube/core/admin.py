@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.contrib.admin import ModelAdmin
+
+from .models import Task
+
+
+class TaskAdmin(ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'run_after',
+        'attempts',
+        'failed_at',
+    )
+    search_fields = ('name',)
+    list_filter = ('name', 'failed_at')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .tasks import LeaseExpired, enqueue, task
+
+
+def dump_message(message):
+    """Return the JSON-serializable fields of an email message.
+
+    Attachments are not supported, none of the queued emails has them.
+    """
+    if message.attachments:
+        raise ValueError('Queued emails cannot have attachments')
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+    }
+
+
+@task(batched=True)
+def send_emails(messages, lease):
+    """Deliver queued messages over one ``QUEUED_EMAIL_BACKEND``
+    connection, renewing the lease of the batch as it goes."""
+    connection = get_connection(settings.QUEUED_EMAIL_BACKEND)
+    errors = []
+    with connection:
+        for fields in messages:
+            try:
+                lease.renew()
+            except LeaseExpired as error:
+                # Other workers own the rest of the batch now
+                return errors + [error] * (len(messages) - len(errors))
+            try:
+                connection.send_messages([
+                    EmailMultiAlternatives(connection=connection, **fields)
+                ])
+            except Exception as error:
+                errors.append(error)
+            else:
+                errors.append(None)
+    return errors
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Email backend that queues every message as a ``send_emails`` task
+    instead of talking to a mail server during the request."""
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            enqueue(send_emails, **dump_message(message))
+        return len(email_messages)
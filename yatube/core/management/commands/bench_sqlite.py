@@ -0,0 +1,245 @@
+import datetime
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.sqlite3.base import FORMAT_QMARK_REGEX
+from django.utils import timezone
+
+from core.sqlite import pragma_statements
+from posts.models import Group, Post
+from posts.search import SEARCH_TABLE
+from posts.utils import POSTS_PER_PAGE
+from users.models import Profile
+
+User = get_user_model()
+
+# Python's default, which Django keeps for SQLite
+DEFAULT_TIMEOUT = 5
+
+
+def bench_tables():
+    return [
+        model._meta.db_table for model in (User, Profile, Group, Post)
+    ] + [SEARCH_TABLE]
+
+
+def schema_statements():
+    """Return the DDL of the feed tables of the project database.
+
+    Their indexes and the triggers of the search index are included,
+    so the benchmark pays for them like the site does.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite':
+        raise CommandError('The project database is not SQLite.')
+    tables = bench_tables()
+    placeholders = ', '.join(['%s'] * len(tables))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT sql FROM sqlite_master '
+            f'WHERE sql IS NOT NULL AND tbl_name IN ({placeholders}) '
+            f"ORDER BY type != 'table', rowid",
+            tables,
+        )
+        statements = [sql for sql, in cursor.fetchall()]
+    if not statements:
+        raise CommandError('The project database is not migrated.')
+    return statements
+
+
+def insert_statement(model):
+    """Return an INSERT of every concrete column of ``model`` but the
+    primary key, and a function giving the parameters of an object."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(field.column) for field in fields),
+        ', '.join(['?'] * len(fields)),
+    )
+
+    def params(obj):
+        return [
+            field.get_db_prep_save(getattr(obj, field.attname), connection)
+            for field in fields
+        ]
+    return sql, params
+
+
+def feed_statement():
+    """Return the SQL of the first page of the index feed."""
+    sql, params = Post.objects.feed()[:POSTS_PER_PAGE].query.sql_with_params()
+    return FORMAT_QMARK_REGEX.sub('?', sql).replace('%%', '%'), params
+
+
+def write_statements():
+    """Return the statements of ``post_create``: the post and both post
+    counters."""
+    post_sql, post_params = insert_statement(Post)
+    return post_sql, post_params, (
+        f'UPDATE {Profile._meta.db_table} '
+        f'SET posts_count = posts_count + 1 WHERE user_id = 1',
+        f'UPDATE {Group._meta.db_table} '
+        f'SET posts_count = posts_count + 1 WHERE id = 1',
+    )
+
+
+def new_post(pub_date):
+    return Post(
+        text=f'Пост от {pub_date:%d.%m.%Y %H:%M:%S}',
+        author_id=1,
+        group_id=1,
+        pub_date=pub_date,
+        updated=pub_date,
+    )
+
+
+def create_database(path, schema, rows):
+    connection = sqlite3.connect(path)
+    for statement in schema:
+        connection.execute(statement)
+    now = timezone.now()
+    for obj in (
+        User(username='bench_author', password='!', date_joined=now),
+        Profile(user_id=1, posts_count=rows),
+        Group(title='Группа', slug='bench-group', posts_count=rows),
+    ):
+        sql, params = insert_statement(type(obj))
+        connection.execute(sql, params(obj))
+    sql, params = insert_statement(Post)
+    connection.executemany(sql, (
+        params(new_post(now - datetime.timedelta(minutes=number)))
+        for number in range(rows)
+    ))
+    connection.commit()
+    connection.close()
+
+
+def run_worker(path, pragmas, role, seconds, results):
+    """Run feed reads or post writes for ``seconds`` and report counts.
+
+    Every write is an explicit transaction like the ``atomic`` block
+    of ``post_create``; ``database is locked`` errors are counted.
+    """
+    feed_sql, feed_params = feed_statement()
+    post_sql, post_params, counter_sql = write_statements()
+    connection = sqlite3.connect(
+        path, timeout=DEFAULT_TIMEOUT, isolation_level=None
+    )
+    for statement in pragma_statements(pragmas):
+        connection.execute(statement)
+
+    done = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            if role == 'read':
+                connection.execute(feed_sql, feed_params).fetchall()
+            else:
+                connection.execute('BEGIN')
+                connection.execute(
+                    post_sql, post_params(new_post(timezone.now()))
+                )
+                for statement in counter_sql:
+                    connection.execute(statement)
+                connection.execute('COMMIT')
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+    connection.close()
+    results.put((role, done, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent feed read and post write throughput of a '
+        'scratch SQLite database under every profile of SQLITE_PROFILES. '
+        'The scratch database copies the post tables of the project '
+        'database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='Number of reading processes.',
+        )
+        parser.add_argument(
+            '--writers', type=int, default=2,
+            help='Number of writing processes.',
+        )
+        parser.add_argument(
+            '--seconds', type=float, default=5,
+            help='How long every profile is measured.',
+        )
+        parser.add_argument(
+            '--rows', type=int, default=10000,
+            help='Number of posts in the scratch database.',
+        )
+        parser.add_argument(
+            '--profile', action='append', dest='profiles',
+            help='Profile to measure; may be repeated. Defaults to all.',
+        )
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'] or list(settings.SQLITE_PROFILES)
+        unknown = set(profiles) - set(settings.SQLITE_PROFILES)
+        if unknown:
+            raise CommandError(f'Unknown profiles: {", ".join(unknown)}')
+
+        self.stdout.write(
+            f'{"profile":<12}{"reads/s":>10}{"writes/s":>10}'
+            f'{"read errors":>13}{"write errors":>14}'
+        )
+        schema = schema_statements()
+        for profile in profiles:
+            totals = self.measure(
+                settings.SQLITE_PROFILES[profile], schema, options
+            )
+            seconds = options['seconds']
+            self.stdout.write(
+                f'{profile:<12}'
+                f'{totals["read"][0] / seconds:>10.0f}'
+                f'{totals["write"][0] / seconds:>10.0f}'
+                f'{totals["read"][1]:>13}'
+                f'{totals["write"][1]:>14}'
+            )
+
+    def measure(self, pragmas, schema, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            create_database(path, schema, options['rows'])
+
+            results = multiprocessing.Queue()
+            roles = (
+                ['read'] * options['readers']
+                + ['write'] * options['writers']
+            )
+            workers = [
+                multiprocessing.Process(
+                    target=run_worker,
+                    args=(path, pragmas, role, options['seconds'], results),
+                )
+                for role in roles
+            ]
+            for worker in workers:
+                worker.start()
+            totals = {'read': [0, 0], 'write': [0, 0]}
+            for _ in workers:
+                role, done, errors = results.get()
+                totals[role][0] += done
+                totals[role][1] += errors
+            for worker in workers:
+                worker.join()
+        return totals
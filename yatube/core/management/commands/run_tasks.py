@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.tasks import run_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background tasks, such as emails, until stopped. '
+        'Several workers may run at once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.TASK_BATCH_SIZE,
+            help='Number of tasks claimed per query.',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=settings.TASK_POLL_INTERVAL,
+            help='Seconds to wait for new tasks when the queue is empty.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once no task is due instead of waiting for more.',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            count = run_tasks(options['batch_size'])
+            total += count
+            if count and options['verbosity'] > 1:
+                self.stdout.write(f'Ran {total} tasks')
+            if count:
+                continue
+            if options['once']:
+                break
+            connections.close_all()
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Ran {total} tasks.'))
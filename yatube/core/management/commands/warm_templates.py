@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.templates import warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Compile every template of the project and the installed apps, '
+        'failing on syntax errors.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        compiled, errors = warm_templates()
+        elapsed = time.monotonic() - started
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'{len(errors)} templates failed to compile.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Compiled {compiled} templates in {elapsed:.2f}s.'
+        ))
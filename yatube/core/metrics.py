@@ -0,0 +1,232 @@
+import atexit
+import fcntl
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Counters of this process, keyed by URL name. Every worker process
+# updates only its own copy, so no locks are taken on the request path.
+_views = {}
+_last_flush = time.monotonic()
+# Process the counters belong to; a forked worker starts from zero
+_pid = None
+# File in METRICS_DIR holding the counters of workers that have exited,
+# so the totals never go down when a worker is replaced
+AGGREGATE_FILE = 'aggregate.json'
+
+
+def empty_view_metrics():
+    return {
+        'count': 0,
+        'buckets': [0] * len(LATENCY_BUCKETS),
+        'seconds': 0.0,
+        'queries': 0,
+        'sql_seconds': 0.0,
+    }
+
+
+def process_file(directory, pid):
+    return os.path.join(directory, f'{pid}.json')
+
+
+def read_views(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_views(views, path):
+    descriptor, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(path), suffix='.tmp'
+    )
+    with os.fdopen(descriptor, 'w') as file:
+        json.dump(views, file)
+    os.replace(temporary, path)
+
+
+def add_views(total, views):
+    """Add the counters of ``views`` to ``total`` in place."""
+    for view, metrics in views.items():
+        summed = total.setdefault(view, empty_view_metrics())
+        for key in ('count', 'seconds', 'queries', 'sql_seconds'):
+            summed[key] += metrics[key]
+        summed['buckets'] = [
+            a + b for a, b in zip(summed['buckets'], metrics['buckets'])
+        ]
+    return total
+
+
+@contextmanager
+def aggregate_lock(directory, operation):
+    """Hold a ``fcntl.flock`` lock of kind ``operation`` on the
+    aggregate.
+
+    Files are retired under an exclusive lock and collected under a
+    shared one, so no one sees a worker in both files or in neither.
+    """
+    with open(os.path.join(directory, 'aggregate.lock'), 'w') as lock:
+        fcntl.flock(lock, operation)
+        yield
+
+
+def retire_process_file(directory, pid):
+    """Move the counters of an exited worker into ``AGGREGATE_FILE``."""
+    with aggregate_lock(directory, fcntl.LOCK_EX):
+        path = process_file(directory, pid)
+        if not os.path.exists(path):
+            return
+        aggregate = os.path.join(directory, AGGREGATE_FILE)
+        write_views(
+            add_views(read_views(aggregate), read_views(path)), aggregate
+        )
+        os.remove(path)
+
+
+def exit_process(directory, pid):
+    # Forked children inherit the handler of the process they copy
+    if pid != os.getpid() or not os.path.isdir(directory):
+        return
+    flush(force=True)
+    retire_process_file(directory, pid)
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def retire_dead_process_files(directory):
+    """Retire the files of workers that exited without cleaning up."""
+    for filename in os.listdir(directory):
+        pid, extension = os.path.splitext(filename)
+        if extension == '.json' and pid.isdigit() and not is_running(int(pid)):
+            retire_process_file(directory, int(pid))
+
+
+def start_process():
+    """Reset the counters in a new worker and own its ``METRICS_DIR``
+    file until the worker exits."""
+    global _pid
+    _pid = os.getpid()
+    _views.clear()
+    directory = settings.METRICS_DIR
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    retire_dead_process_files(directory)
+    # A file left under a reused pid belongs to an older process
+    retire_process_file(directory, _pid)
+    atexit.register(exit_process, directory, _pid)
+
+
+def record(view, seconds, queries, sql_seconds):
+    if _pid != os.getpid():
+        start_process()
+    metrics = _views.get(view)
+    if metrics is None:
+        metrics = _views[view] = empty_view_metrics()
+    metrics['count'] += 1
+    metrics['seconds'] += seconds
+    metrics['queries'] += queries
+    metrics['sql_seconds'] += sql_seconds
+    for number, bound in enumerate(LATENCY_BUCKETS):
+        if seconds <= bound:
+            metrics['buckets'][number] += 1
+            break
+
+
+def reset():
+    _views.clear()
+
+
+def flush(force=False):
+    """Write the counters of this process to ``METRICS_DIR``.
+
+    Unless ``force`` is set, the file is rewritten at most once per
+    ``METRICS_FLUSH_INTERVAL`` seconds.
+    """
+    global _last_flush
+    directory = settings.METRICS_DIR
+    now = time.monotonic()
+    if not directory:
+        return
+    if not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _last_flush = now
+
+    os.makedirs(directory, exist_ok=True)
+    write_views(_views, process_file(directory, os.getpid()))
+
+
+def collect():
+    """Return the counters of all processes sharing ``METRICS_DIR``.
+
+    Without a shared directory only this process is reported. The
+    counters of workers that are no longer running are kept in
+    ``AGGREGATE_FILE``, so the totals only ever grow.
+    """
+    directory = settings.METRICS_DIR
+    if not directory:
+        return _views
+    flush(force=True)
+    retire_dead_process_files(directory)
+
+    total = {}
+    with aggregate_lock(directory, fcntl.LOCK_SH):
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith('.json'):
+                path = os.path.join(directory, filename)
+                add_views(total, read_views(path))
+    return total
+
+
+def render(views):
+    """Format the counters in the Prometheus text exposition format."""
+    lines = [
+        '# HELP yatube_request_duration_seconds Request latency by URL name.',
+        '# TYPE yatube_request_duration_seconds histogram',
+    ]
+    for view, metrics in sorted(views.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, metrics['buckets']):
+            cumulative += count
+            lines.append(
+                f'yatube_request_duration_seconds_bucket'
+                f'{{view="{view}",le="{bound}"}} {cumulative}'
+            )
+        lines += [
+            f'yatube_request_duration_seconds_bucket'
+            f'{{view="{view}",le="+Inf"}} {metrics["count"]}',
+            f'yatube_request_duration_seconds_sum{{view="{view}"}} '
+            f'{metrics["seconds"]}',
+            f'yatube_request_duration_seconds_count{{view="{view}"}} '
+            f'{metrics["count"]}',
+        ]
+
+    counters = (
+        ('yatube_sql_queries_total', 'SQL queries by URL name.',
+         'queries'),
+        ('yatube_sql_duration_seconds_total',
+         'Time spent in SQL by URL name.', 'sql_seconds'),
+    )
+    for name, help_text, key in counters:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        lines += [
+            f'{name}{{view="{view}"}} {metrics[key]}'
+            for view, metrics in sorted(views.items())
+        ]
+    return '\n'.join(lines) + '\n'
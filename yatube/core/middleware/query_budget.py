@@ -0,0 +1,63 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries):
+    """Declare how many SQL queries a view may run per request."""
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+class QueryLog:
+    """``execute_wrapper`` collecting the SQL of the queries of a
+    request."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMiddleware:
+    """Fail requests whose view runs more queries than it declared.
+
+    Enabled by ``QUERY_BUDGET_ENABLED``. The budget covers the queries
+    sent to every database, replicas included, by everything below this
+    middleware, including the lazy session and user lookups made while
+    rendering the template.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_BUDGET_ENABLED:
+            return self.get_response(request)
+
+        queries = QueryLog()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and len(queries.statements) > budget:
+            statements = '\n'.join(queries.statements)
+            raise QueryBudgetExceeded(
+                f'{request.path} ran {len(queries.statements)} queries, '
+                f'budget is {budget}:\n{statements}'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, 'query_budget', None)
@@ -0,0 +1,43 @@
+from django.conf import settings
+
+from core.routers import pop_writes, set_replica_reads
+
+STICKY_COOKIE = 'primary_reads'
+
+
+def replica_reads(view_func):
+    """Let safe requests to the view read from the read replicas."""
+    view_func.replica_reads = True
+    return view_func
+
+
+class ReplicaMiddleware:
+    """Turn on replica reads for views marked with ``replica_reads``.
+
+    After a request writes to the primary, the client gets a cookie that
+    keeps its reads on the primary for ``REPLICA_STICKY_SECONDS``, so
+    authors see their posts before the replicas catch up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pop_writes()
+        try:
+            response = self.get_response(request)
+        finally:
+            set_replica_reads(False)
+
+        if pop_writes():
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        set_replica_reads(
+            getattr(view_func, 'replica_reads', False)
+            and request.method in ('GET', 'HEAD')
+            and STICKY_COOKIE not in request.COOKIES
+        )
@@ -0,0 +1,186 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+# Hashed names change with their content, so they are never revalidated
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Precompressed variants in the order they are preferred
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Content types of the variants when they are requested by their own name
+COMPRESSED_TYPES = {'br': 'application/x-brotli', 'gzip': 'application/gzip'}
+
+
+def accepted_encodings(header):
+    """Return the qvalues an ``Accept-Encoding`` header gives codings.
+
+    Malformed qvalues count as zero, so such codings are refused.
+    """
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def encoding_allowed(accepted, coding):
+    """Tell whether ``coding`` is allowed by ``accepted_encodings``.
+
+    Codings the header does not name fall back to ``*``; identity is
+    allowed unless it is refused by name or by ``*;q=0``.
+    """
+    if coding in accepted:
+        return accepted[coding] > 0
+    if '*' in accepted:
+        return accepted['*'] > 0
+    return coding == 'identity'
+
+
+class StaticFilesMiddleware:
+    """Serve the files collected into ``STATIC_ROOT``.
+
+    Enabled by ``STATIC_SERVE``. Names from the staticfiles manifest
+    are cached by clients for a year, other names for
+    ``STATIC_MAX_AGE`` seconds. The ``.br`` or ``.gz`` variant written
+    by ``collectstatic`` is sent when the client accepts it; a variant
+    requested by its own name is sent as a compressed file of its own.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.files = {}
+        self.manifest_version = None
+        self.manifest_names = set()
+
+    def hashed_names(self):
+        """Return the hashed names of the staticfiles manifest.
+
+        The manifest is read again whenever ``collectstatic`` rewrote
+        it, and the remembered files are dropped with it.
+        """
+        manifest_name = getattr(staticfiles_storage, 'manifest_name', None)
+        if manifest_name is None:
+            return self.manifest_names
+        try:
+            version = os.stat(
+                staticfiles_storage.path(manifest_name)
+            ).st_mtime_ns
+        except (OSError, NotImplementedError):
+            version = None
+        if version != self.manifest_version:
+            staticfiles_storage.hashed_files = (
+                staticfiles_storage.load_manifest()
+            )
+            self.manifest_names = set(
+                staticfiles_storage.hashed_files.values()
+            )
+            self.manifest_version = version
+            self.files.clear()
+        return self.manifest_names
+
+    def __call__(self, request):
+        if (not settings.STATIC_SERVE
+                or request.method not in ('GET', 'HEAD')
+                or not request.path.startswith(settings.STATIC_URL)):
+            return self.get_response(request)
+
+        name = request.path[len(settings.STATIC_URL):]
+        hashed = name in self.hashed_names()
+        found = self.find(name)
+        if found is None:
+            return self.get_response(request)
+        try:
+            return self.serve(request, hashed, *found)
+        except FileNotFoundError:
+            # The file or a variant was removed since it was found
+            del self.files[name]
+            found = self.find(name)
+        if found is None:
+            return self.get_response(request)
+        return self.serve(request, hashed, *found)
+
+    def find(self, name):
+        """Return the path of a collected file and its variants.
+
+        Only found files are remembered, so unknown names cannot grow
+        the lookup table.
+        """
+        if name in self.files:
+            return self.files[name]
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        variants = [
+            (encoding, path + suffix)
+            for encoding, suffix in ENCODINGS
+            if os.path.isfile(path + suffix)
+        ]
+        self.files[name] = path, variants
+        return self.files[name]
+
+    def serve(self, request, hashed, path, variants):
+        modified = os.stat(path).st_mtime
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'), modified
+        ):
+            response = HttpResponseNotModified()
+        else:
+            response = self.file_response(request, path, variants)
+
+        response['Last-Modified'] = http_date(modified)
+        if hashed:
+            response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}'
+            )
+        if variants:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def file_response(self, request, path, variants):
+        """Open the variant the client accepts, or the file itself."""
+        content_type, file_encoding = mimetypes.guess_type(path)
+        if file_encoding is not None:
+            return FileResponse(open(path, 'rb'), content_type=(
+                COMPRESSED_TYPES.get(file_encoding, 'application/octet-stream')
+            ))
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        encoding, file_path = next(
+            (
+                variant for variant in variants
+                if encoding_allowed(accepted, variant[0])
+            ),
+            (None, path),
+        )
+        if encoding is None and not encoding_allowed(accepted, 'identity'):
+            return HttpResponse(status=406)
+        response = FileResponse(
+            open(file_path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+        return response
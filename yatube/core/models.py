@@ -0,0 +1,39 @@
+from django.db import models
+from django.db.models import Model
+from django.utils import timezone
+
+
+class Task(Model):
+    """A queued call of a function registered with ``core.tasks.task``.
+
+    Done tasks are deleted. Tasks that failed ``TASK_MAX_ATTEMPTS``
+    times are kept with ``failed_at`` set.
+    """
+
+    name = models.CharField('Задача', max_length=200)
+
+    payload = models.TextField('Аргументы', default='{}')
+
+    run_after = models.DateTimeField('Выполнить после', default=timezone.now)
+
+    attempts = models.PositiveIntegerField('Попытки', default=0)
+
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    lock = models.CharField('Блокировка', max_length=32, blank=True)
+
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+
+    failed_at = models.DateTimeField('Дата отказа', blank=True, null=True)
+
+    def __str__(self) -> str:
+        return f'{self.name} #{self.pk}'
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('failed_at', 'run_after', 'id'),
+                name='task_queue_idx',
+            ),
+            models.Index(fields=('lock',), name='task_lock_idx'),
+        )
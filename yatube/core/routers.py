@@ -0,0 +1,50 @@
+import random
+import threading
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def set_replica_reads(enabled):
+    """Let the reads of the current thread go to a replica or not.
+
+    One replica is picked per request, so that all its reads see the
+    same replication state.
+    """
+    _state.replica = None
+    if enabled and settings.REPLICA_DATABASES:
+        _state.replica = random.choice(settings.REPLICA_DATABASES)
+
+
+def pop_writes():
+    """Tell whether the current thread wrote since the last call."""
+    wrote = getattr(_state, 'wrote', False)
+    _state.wrote = False
+    return wrote
+
+
+class ReplicaRouter:
+    """Route the reads of marked requests to the read replicas.
+
+    Writes always go to the primary ``default`` database. Reads go to
+    the replica ``set_replica_reads`` picked for the current thread
+    only while it has not written yet, so a request always reads its
+    own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = getattr(_state, 'replica', None)
+        if replica and not getattr(_state, 'wrote', False):
+            return replica
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.REPLICA_DATABASES}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
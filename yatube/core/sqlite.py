@@ -0,0 +1,9 @@
+def pragma_statements(pragmas):
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+def apply_pragmas(connection, pragmas):
+    """Run the ``PRAGMA`` statements of a profile on a new connection."""
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
@@ -0,0 +1,56 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Files of these types are worth compressing; images and fonts are
+# compressed already
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.json', '.txt', '.xml', '.html', '.ico',
+)
+
+
+def compressors():
+    """Yield ``(suffix, compress)`` of the available encodings."""
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+    yield '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes brotli and gzip variants.
+
+    Every compressible file, hashed or not, gets a ``.br`` and a
+    ``.gz`` sibling at ``collectstatic`` time unless compressing saves
+    less than ``STATIC_COMPRESS_MIN_SAVING`` of it. Brotli is skipped
+    when the ``brotli`` package is missing.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as file:
+            data = file.read()
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            saving = 1 - len(compressed) / max(len(data), 1)
+            if saving < settings.STATIC_COMPRESS_MIN_SAVING:
+                continue
+            with open(path + suffix, 'wb') as file:
+                file.write(compressed)
@@ -0,0 +1,199 @@
+import datetime
+import json
+import time
+import traceback
+import uuid
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+# Registered tasks: name -> (function, batched)
+_tasks = {}
+
+
+def task_name(func):
+    return f'{func.__module__}.{func.__name__}'
+
+
+def task(func=None, *, batched=False):
+    """Register ``func`` to be run by the ``run_tasks`` worker.
+
+    A batched task is called once per claimed batch with the list of
+    the keyword arguments of its tasks and their ``Lease``, and returns
+    a list of the same length holding ``None`` or the exception of
+    every task, so that the batch can share one connection. It calls
+    ``lease.renew()`` before every task of the batch.
+    """
+    def register(func):
+        _tasks[task_name(func)] = (func, batched)
+        return func
+    return register if func is None else register(func)
+
+
+def lookup(name):
+    """Return the registered ``(function, batched)`` pair of ``name``,
+    importing its module first if needed."""
+    if name not in _tasks:
+        try:
+            import_string(name)
+        except ImportError:
+            pass
+    if name not in _tasks:
+        raise LookupError(f'Task {name} is not registered')
+    return _tasks[name]
+
+
+def enqueue(func, **kwargs):
+    """Queue a call of a registered task with JSON ``kwargs``.
+
+    Outside ``transaction.atomic()`` the row is committed at once, and
+    a worker may run the task before the caller's other writes are
+    committed or even if they fail; callers that depend on those writes
+    enqueue inside the same ``atomic()`` block.
+    """
+    name = task_name(func)
+    lookup(name)
+    return Task.objects.create(name=name, payload=json.dumps(kwargs))
+
+
+class LeaseExpired(Exception):
+    """The claimed tasks may have been claimed by another worker."""
+
+
+class Lease:
+    """The lease a worker holds on the tasks it claimed together."""
+
+    def __init__(self, tasks):
+        self.token = tasks[0].lock if tasks else ''
+        self.count = len(tasks)
+        self.renewed = time.monotonic()
+
+    def renew(self):
+        """Extend the lease once half of ``TASK_LEASE_SECONDS`` passed.
+
+        Raises ``LeaseExpired`` if another worker claimed some of the
+        tasks meanwhile, so that they are not run twice.
+        """
+        if time.monotonic() - self.renewed < settings.TASK_LEASE_SECONDS / 2:
+            return
+        renewed = Task.objects.filter(lock=self.token).update(
+            run_after=lease_end(timezone.now())
+        )
+        if renewed < self.count:
+            raise LeaseExpired(f'Lease {self.token} expired')
+        self.renewed = time.monotonic()
+
+
+def lease_end(now):
+    return now + datetime.timedelta(seconds=settings.TASK_LEASE_SECONDS)
+
+
+def claim(limit):
+    """Lease up to ``limit`` due tasks to this worker.
+
+    The lease moves ``run_after`` by ``TASK_LEASE_SECONDS``, so tasks
+    of a worker that died are run again once it runs out. Every claim
+    counts as an attempt, so a task that keeps killing its worker is
+    given up after ``TASK_MAX_ATTEMPTS`` as well.
+    """
+    now = timezone.now()
+    Task.objects.filter(
+        failed_at__isnull=True,
+        run_after__lte=now,
+        attempts__gte=settings.TASK_MAX_ATTEMPTS,
+    ).update(failed_at=now, lock='')
+    due = Task.objects.filter(
+        failed_at__isnull=True, run_after__lte=now
+    ).order_by('run_after', 'id').values_list('pk', flat=True)[:limit]
+    token = uuid.uuid4().hex
+    Task.objects.filter(pk__in=list(due), run_after__lte=now).update(
+        lock=token,
+        run_after=lease_end(now),
+        attempts=F('attempts') + 1,
+    )
+    return list(Task.objects.filter(lock=token).order_by('run_after', 'id'))
+
+
+def call(name, tasks, lease):
+    """Run ``tasks`` of one name and return their errors."""
+    try:
+        func, batched = lookup(name)
+        payloads = [json.loads(queued.payload) for queued in tasks]
+    except (LookupError, ValueError) as error:
+        return [error] * len(tasks)
+    if batched:
+        try:
+            return func(payloads, lease)
+        except Exception as error:
+            return [error] * len(tasks)
+    return call_each(func, payloads, lease)
+
+
+def call_each(func, payloads, lease):
+    """Run the tasks of a plain task one by one, renewing the lease."""
+    errors = []
+    for payload in payloads:
+        try:
+            lease.renew()
+        except LeaseExpired as error:
+            return errors + [error] * (len(payloads) - len(errors))
+        try:
+            func(**payload)
+        except Exception as error:
+            errors.append(error)
+        else:
+            errors.append(None)
+    return errors
+
+
+def retry(queued, error):
+    """Release a failed task to be run again later, if it is still
+    leased to this worker; ``attempts`` was counted by ``claim``."""
+    last_error = ''.join(
+        traceback.format_exception(type(error), error, error.__traceback__)
+    )
+    now = timezone.now()
+    if queued.attempts >= settings.TASK_MAX_ATTEMPTS:
+        failed_at, run_after = now, queued.run_after
+    else:
+        delay = settings.TASK_RETRY_DELAY * 2 ** (queued.attempts - 1)
+        failed_at, run_after = None, now + datetime.timedelta(seconds=delay)
+    Task.objects.filter(pk=queued.pk, lock=queued.lock).update(
+        lock='', last_error=last_error, failed_at=failed_at,
+        run_after=run_after,
+    )
+
+
+def run_tasks(limit=None):
+    """Run one batch of due tasks and return the number of them.
+
+    Done tasks are deleted; failed ones are retried after
+    ``TASK_RETRY_DELAY`` seconds, doubled on every attempt. Tasks whose
+    lease expired meanwhile are left to the worker that claimed them
+    again.
+    """
+    tasks = claim(limit or settings.TASK_BATCH_SIZE)
+    lease = Lease(tasks)
+    by_name = {}
+    for queued in tasks:
+        by_name.setdefault(queued.name, []).append(queued)
+
+    done = []
+    failed = []
+    for name, named_tasks in by_name.items():
+        errors = call(name, named_tasks, lease)
+        for queued, error in zip(named_tasks, errors):
+            if error is None:
+                done.append(queued.pk)
+            else:
+                failed.append((queued, error))
+    # Failed tasks keep the lock until the batch ends, so that renewing
+    # the lease still finds every claimed task
+    for queued, error in failed:
+        retry(queued, error)
+    Task.objects.filter(pk__in=done, lock=lease.token).delete()
+    return len(tasks)
@@ -0,0 +1,51 @@
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+TEMPLATE_SUFFIXES = ('.html', '.txt', '.xml')
+
+
+def loader_dirs(loaders):
+    for loader in loaders:
+        if hasattr(loader, 'loaders'):
+            yield from loader_dirs(loader.loaders)
+        elif hasattr(loader, 'get_dirs'):
+            yield from loader.get_dirs()
+
+
+def template_names(engine):
+    """Yield the names of all templates the loaders of an engine find."""
+    seen = set()
+    for template_dir in loader_dirs(engine.engine.template_loaders):
+        for root, _, files in os.walk(template_dir):
+            for filename in sorted(files):
+                if not filename.endswith(TEMPLATE_SUFFIXES):
+                    continue
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, template_dir).replace(
+                    os.sep, '/'
+                )
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+
+def warm_templates():
+    """Compile every template, filling the cached loader if it is used.
+
+    Returns the number of compiled templates and a ``{name: error}``
+    dict of the templates that failed to compile.
+    """
+    compiled, errors = 0, {}
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for name in template_names(engine):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as error:
+                errors[name] = error
+            else:
+                compiled += 1
+    return compiled, errors
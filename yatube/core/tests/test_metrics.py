@@ -0,0 +1,146 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import metrics
+
+User = get_user_model()
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        author = User.objects.create_user(username='author_name')
+        Post.objects.create(text='Тестовый пост', author=author)
+
+    def setUp(self):
+        metrics.reset()
+
+        self.guest_client = Client()
+
+    def scrape(self):
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_requests_are_recorded_per_view(self):
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('about:author'))
+
+        output = self.scrape()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            output,
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 2',
+            output,
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="about:author"} 1',
+            output,
+        )
+        self.assertIn('yatube_sql_queries_total{view="about:author"} 0',
+                      output)
+        self.assertGreater(metrics._views['posts:index']['queries'], 0)
+
+    def test_metrics_are_internal(self):
+        response = self.guest_client.get(
+            reverse('metrics'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret', METRICS_ALLOWED_IPS=[])
+    def test_token_is_required_behind_proxy(self):
+        cases = (
+            ({}, 404),
+            ({'HTTP_AUTHORIZATION': 'Bearer wrong'}, 404),
+            ({'HTTP_AUTHORIZATION': 'Bearer secret'}, 200),
+        )
+        for headers, status_code in cases:
+            with self.subTest(headers=headers):
+                response = self.guest_client.get(reverse('metrics'), **headers)
+                self.assertEqual(response.status_code, status_code)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_metrics_are_not_recorded(self):
+        self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(metrics._views, {})
+
+    def test_processes_are_aggregated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            other = metrics.empty_view_metrics()
+            other.update(count=3, queries=9)
+            with open(os.path.join(directory, '1.json'), 'w') as file:
+                json.dump({'posts:index': other}, file)
+
+            with override_settings(METRICS_DIR=directory):
+                self.guest_client.get(reverse('posts:index'))
+                output = self.scrape()
+
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 4',
+            output,
+        )
+
+    def test_counters_of_dead_processes_are_kept(self):
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        with tempfile.TemporaryDirectory() as directory:
+            other = metrics.empty_view_metrics()
+            other.update(count=3)
+            for pid in (process.pid, os.getppid()):
+                with open(os.path.join(directory, f'{pid}.json'), 'w') as file:
+                    json.dump({'posts:index': other}, file)
+
+            with override_settings(METRICS_DIR=directory):
+                self.guest_client.get(reverse('posts:index'))
+                output = self.scrape()
+                files = sorted(os.listdir(directory))
+
+        self.assertEqual(files, sorted([
+            f'{os.getppid()}.json', f'{os.getpid()}.json',
+            metrics.AGGREGATE_FILE, 'aggregate.lock',
+        ]))
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 7',
+            output,
+        )
+
+    def test_exited_process_is_kept_in_aggregate(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(METRICS_DIR=directory):
+                metrics._pid = None
+                metrics.record('posts:index', 0.1, 1, 0.01)
+                metrics.exit_process(directory, os.getpid())
+                metrics.reset()
+                self.assertEqual(
+                    metrics.collect()['posts:index']['count'], 1
+                )
+
+    def test_new_process_starts_from_zero(self):
+        metrics.record('posts:index', 0.1, 1, 0.01)
+        with tempfile.TemporaryDirectory() as directory:
+            with open(metrics.process_file(directory, os.getpid()), 'w') as f:
+                json.dump({'posts:index': metrics.empty_view_metrics()}, f)
+
+            with override_settings(METRICS_DIR=directory):
+                metrics._pid = None
+                metrics.record('about:author', 0.1, 0, 0.0)
+                self.assertNotIn(
+                    f'{os.getpid()}.json', os.listdir(directory)
+                )
+
+        self.assertEqual(list(metrics._views), ['about:author'])
@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from posts.models import Post
+from posts.utils import POSTS_PER_PAGE
+
+from ..management.commands.bench_sqlite import (
+    create_database, feed_statement, schema_statements
+)
+from ..signals import tune_sqlite_connection
+
+# Pragmas the tests change on the shared test connection
+CHANGED_PRAGMAS = ('cache_size',)
+
+
+class SqliteProfileTests(TestCase):
+    def setUp(self):
+        self.pragmas = {name: self.pragma(name) for name in CHANGED_PRAGMAS}
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            for name, value in self.pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1234})
+    def test_pragmas_are_applied_to_new_connections(self):
+        tune_sqlite_connection(sender=None, connection=connection)
+        self.assertEqual(self.pragma('cache_size'), -1234)
+
+    def test_bench_sqlite_measures_every_profile(self):
+        out = StringIO()
+        call_command(
+            'bench_sqlite', '--seconds=0.2', '--readers=1', '--writers=1',
+            '--rows=10', stdout=out,
+        )
+        output = out.getvalue()
+        for profile in ('default', 'production'):
+            with self.subTest(profile=profile):
+                self.assertIn(profile, output)
+
+    def test_bench_copies_the_post_tables(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            create_database(path, schema_statements(), 20)
+            bench = sqlite3.connect(path)
+            columns = [
+                row[1]
+                for row in bench.execute('PRAGMA table_info(posts_post)')
+            ]
+            sql, params = feed_statement()
+            feed = bench.execute(sql, params).fetchall()
+            bench.close()
+
+        self.assertCountEqual(
+            columns, [field.column for field in Post._meta.concrete_fields]
+        )
+        self.assertEqual(len(feed), POSTS_PER_PAGE)
@@ -0,0 +1,191 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.utils.http import http_date
+
+from .. import storage
+from ..middleware.static import (
+    IMMUTABLE_CACHE_CONTROL, accepted_encodings, encoding_allowed
+)
+
+CSS = 'body { background: url("../img/logo.png"); }\n' * 200
+
+
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'w') as file:
+            file.write(CSS)
+        shutil.copytree(
+            os.path.join(settings.BASE_DIR, 'static', 'img'),
+            os.path.join(cls.source, 'img'),
+        )
+
+        cls.settings = override_settings(
+            STATIC_SERVE=True,
+            STATIC_ROOT=cls.root,
+            STATICFILES_DIRS=[cls.source],
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder',
+            ],
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            ),
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.source)
+        shutil.rmtree(cls.root)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.url = staticfiles_storage.url('css/site.css')
+        name = staticfiles_storage.stored_name('css/site.css')
+        with staticfiles_storage.open(name) as file:
+            self.content = file.read()
+
+    def test_collectstatic_writes_compressed_variants(self):
+        name = staticfiles_storage.stored_name('css/site.css')
+        self.assertNotEqual(name, 'css/site.css')
+        path = staticfiles_storage.path(name)
+        with open(path + '.gz', 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()), self.content)
+        self.assertEqual(
+            os.path.exists(path + '.br'), storage.brotli is not None
+        )
+        logo = staticfiles_storage.path(
+            staticfiles_storage.stored_name('img/logo.png')
+        )
+        self.assertFalse(os.path.exists(logo + '.gz'))
+
+    def test_hashed_files_are_immutable(self):
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_unhashed_files_are_revalidated(self):
+        response = self.guest_client.get(
+            settings.STATIC_URL + 'css/site.css'
+        )
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+
+    def test_precompressed_variant_is_chosen(self):
+        response = self.guest_client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        content = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(content), self.content)
+
+        response = self.guest_client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_variant_requested_by_name_is_not_encoded(self):
+        response = self.guest_client.get(
+            self.url + '.gz', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        content = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(content), self.content)
+
+    def test_not_modified(self):
+        response = self.guest_client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_files_fall_through(self):
+        for url in (settings.STATIC_URL + 'css/missing.css',
+                    settings.STATIC_URL + '../settings.py'):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            accepted_encodings('br;q=1.0, gzip;q=0, deflate'),
+            {'br': 1.0, 'gzip': 0.0, 'deflate': 1.0},
+        )
+        table = (
+            ('', 'gzip', False),
+            ('', 'identity', True),
+            ('*', 'gzip', True),
+            ('*;q=0, gzip', 'gzip', True),
+            ('*;q=0, gzip', 'br', False),
+            ('*;q=0', 'identity', False),
+            ('gzip, identity;q=0', 'identity', False),
+            ('gzip;q=oops', 'gzip', False),
+        )
+        for header, coding, allowed in table:
+            with self.subTest(header=header, coding=coding):
+                self.assertEqual(
+                    encoding_allowed(accepted_encodings(header), coding),
+                    allowed,
+                )
+
+    def test_wildcard_and_refused_identity(self):
+        response = self.guest_client.get(self.url, HTTP_ACCEPT_ENCODING='*')
+        self.assertTrue(response.has_header('Content-Encoding'))
+
+        logo = staticfiles_storage.url('img/logo.png')
+        response = self.guest_client.get(
+            logo, HTTP_ACCEPT_ENCODING='gzip, identity;q=0'
+        )
+        self.assertEqual(response.status_code, 406)
+
+    def test_removed_variant_is_found_again(self):
+        self.guest_client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        path = staticfiles_storage.path(
+            staticfiles_storage.stored_name('css/site.css')
+        )
+        os.rename(path + '.gz', path + '.gz.bak')
+        self.addCleanup(os.rename, path + '.gz.bak', path + '.gz')
+
+        response = self.guest_client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_manifest_is_reloaded_after_collectstatic(self):
+        self.guest_client.get(self.url)
+        source = os.path.join(self.source, 'css', 'site.css')
+        self.addCleanup(call_command, 'collectstatic', interactive=False,
+                        verbosity=0)
+        self.addCleanup(self.write, source, CSS)
+        self.write(source, CSS + 'p { color: red; }\n')
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+        name = staticfiles_storage.load_manifest()['css/site.css']
+        response = self.guest_client.get(settings.STATIC_URL + name)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+
+    def write(self, path, content):
+        with open(path, 'w') as file:
+            file.write(content)
@@ -0,0 +1,192 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Task
+from ..tasks import Lease, LeaseExpired, claim, enqueue, run_tasks, task
+
+User = get_user_model()
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+@task
+def failing_task(message):
+    raise RuntimeError(message)
+
+
+@task
+def remember_task(value):
+    remember_task.values.append(value)
+
+
+remember_task.values = []
+
+
+@task
+def reclaimed_task():
+    # Another worker claims the task after this one's lease ran out
+    Task.objects.update(lock='other')
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    QUEUED_EMAIL_BACKEND='core.tests.test_tasks.CountingBackend',
+)
+class QueuedEmailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(
+            username='user_name',
+            email='user@example.com',
+            password='Tr1cky-passw0rd',
+        )
+
+    def setUp(self):
+        CountingBackend.opened = 0
+
+        self.guest_client = Client()
+
+    def test_password_reset_email_is_queued(self):
+        response = self.guest_client.post(
+            reverse('users:password_reset'),
+            data={'email': 'user@example.com'},
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Task.objects.count(), 1)
+
+        self.assertEqual(run_tasks(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+        self.assertIn('/auth/reset/', mail.outbox[0].body)
+        self.assertFalse(Task.objects.exists())
+
+    def test_signup_queues_welcome_email(self):
+        self.guest_client.post(reverse('users:signup'), data={
+            'username': 'new_user',
+            'email': 'new@example.com',
+            'password1': 'Tr1cky-passw0rd',
+            'password2': 'Tr1cky-passw0rd',
+        })
+        self.assertEqual(len(mail.outbox), 0)
+
+        run_tasks()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+        self.assertIn('new_user', mail.outbox[0].body)
+
+    def test_batch_shares_one_connection(self):
+        for number in range(3):
+            mail.send_mail(
+                f'Письмо №{number}', 'Текст', None, ['user@example.com']
+            )
+
+        call_command('run_tasks', '--once', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingBackend.opened, 1)
+
+    @override_settings(TASK_LEASE_SECONDS=0)
+    def test_batch_renews_its_lease(self):
+        for number in range(2):
+            mail.send_mail(
+                f'Письмо №{number}', 'Текст', None, ['user@example.com']
+            )
+
+        self.assertEqual(run_tasks(), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(Task.objects.exists())
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        remember_task.values.clear()
+
+    def test_tasks_run_in_order(self):
+        for value in range(3):
+            enqueue(remember_task, value=value)
+
+        self.assertEqual(run_tasks(), 3)
+        self.assertEqual(remember_task.values, [0, 1, 2])
+        self.assertEqual(run_tasks(), 0)
+
+    def test_claimed_tasks_are_leased(self):
+        enqueue(remember_task, value=1)
+
+        self.assertEqual(len(claim(10)), 1)
+        self.assertEqual(claim(10), [])
+
+    @override_settings(TASK_MAX_ATTEMPTS=2, TASK_RETRY_DELAY=30)
+    def test_failed_task_is_retried_then_given_up(self):
+        queued = enqueue(failing_task, message='Сервер недоступен')
+
+        run_tasks()
+        queued.refresh_from_db()
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('Сервер недоступен', queued.last_error)
+        self.assertGreater(
+            queued.run_after,
+            timezone.now() + datetime.timedelta(seconds=20),
+        )
+        self.assertEqual(run_tasks(), 0)
+
+        Task.objects.update(run_after=timezone.now())
+        run_tasks()
+        queued.refresh_from_db()
+        self.assertEqual(queued.attempts, 2)
+        self.assertIsNotNone(queued.failed_at)
+
+        Task.objects.update(run_after=timezone.now())
+        self.assertEqual(run_tasks(), 0)
+
+    @override_settings(TASK_MAX_ATTEMPTS=2)
+    def test_crashing_task_is_given_up(self):
+        queued = enqueue(remember_task, value=1)
+
+        for attempt in range(2):
+            self.assertEqual(len(claim(10)), 1)
+            # The worker died, its lease runs out
+            Task.objects.update(run_after=timezone.now())
+
+        self.assertEqual(claim(10), [])
+        queued.refresh_from_db()
+        self.assertEqual(queued.attempts, 2)
+        self.assertIsNotNone(queued.failed_at)
+
+    @override_settings(TASK_LEASE_SECONDS=0)
+    def test_expired_lease_is_detected(self):
+        enqueue(remember_task, value=1)
+        lease = Lease(claim(10))
+
+        lease.renew()
+        Task.objects.update(lock='other')
+        with self.assertRaises(LeaseExpired):
+            lease.renew()
+
+    def test_reclaimed_task_is_left_to_its_new_worker(self):
+        enqueue(reclaimed_task)
+
+        run_tasks()
+        self.assertEqual(Task.objects.get().lock, 'other')
+
+    def test_unregistered_functions_are_refused(self):
+        def not_a_task():
+            pass
+
+        with self.assertRaises(LookupError):
+            enqueue(not_a_task)
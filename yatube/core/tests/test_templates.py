@@ -0,0 +1,34 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.template import engines
+from django.test import TestCase, override_settings
+
+from ..templates import template_names
+
+
+class WarmTemplatesTests(TestCase):
+    def test_project_and_app_templates_are_found(self):
+        names = set(template_names(engines['django']))
+        for name in ('base.html', 'posts/index.html', 'admin/base.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, names)
+
+    def test_warm_templates(self):
+        out = StringIO()
+        call_command('warm_templates', stdout=out)
+        self.assertIn('Compiled', out.getvalue())
+
+    def test_broken_template_fails(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'broken.html'), 'w') as file:
+                file.write('{% if %}')
+            templates = [{**settings.TEMPLATES[0], 'DIRS': [directory]}]
+            with override_settings(TEMPLATES=templates):
+                with self.assertRaises(CommandError):
+                    call_command(
+                        'warm_templates', stdout=StringIO(), stderr=StringIO()
+                    )
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from . import metrics as metrics_registry
+
+
+def metrics_allowed(request):
+    """Tell whether the request may read the metrics.
+
+    ``REMOTE_ADDR`` is trusted only for ``METRICS_ALLOWED_IPS``; behind a
+    proxy it is the proxy's address, so scrapers there use the token.
+    """
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and constant_time_compare(authorization, f'Bearer {token}'):
+        return True
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def metrics(request):
+    """Expose request metrics to Prometheus."""
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(
+        metrics_registry.render(metrics_registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
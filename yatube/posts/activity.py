@@ -0,0 +1,131 @@
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Count, F, IntegerField, OuterRef, Q, Subquery, Sum
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Group, GroupActivity, Post
+
+
+def activity_day(pub_date):
+    return timezone.localdate(pub_date)
+
+
+def activity_since():
+    """Return the first day counted in the group directory."""
+    return timezone.localdate() - datetime.timedelta(
+        days=settings.GROUP_ACTIVITY_DAYS - 1
+    )
+
+
+def prune_group_activity(group_ids=None):
+    """Delete the buckets of days before ``GROUP_ACTIVITY_DAYS``."""
+    old = GroupActivity.objects.filter(day__lt=activity_since())
+    if group_ids is not None:
+        old = old.filter(group_id__in=group_ids)
+    old.delete()
+
+
+def shift_bucket(group_id, day, delta):
+    # Days out of the window are never read, so no bucket is kept for them
+    if day < activity_since():
+        return
+    updated = GroupActivity.objects.filter(group_id=group_id, day=day).update(
+        posts_count=F('posts_count') + delta
+    )
+    if updated or delta < 0:
+        return
+    _, created = GroupActivity.objects.get_or_create(
+        group_id=group_id, day=day, defaults={'posts_count': delta}
+    )
+    if not created:
+        GroupActivity.objects.filter(group_id=group_id, day=day).update(
+            posts_count=F('posts_count') + delta
+        )
+    else:
+        # A group gets a new bucket at most once a day, so the buckets
+        # that left the window are dropped then
+        prune_group_activity([group_id])
+
+
+def newest_post_date():
+    return Subquery(
+        Post.objects.filter(group=OuterRef('pk'))
+        .order_by('-pub_date', '-id')
+        .values('pub_date')[:1]
+    )
+
+
+def change_group_activity(delta, posts):
+    """Shift the daily activity and the last post dates of groups.
+
+    ``posts`` are ``(group_id, pub_date)`` pairs of the posts added to
+    groups, or removed from them when ``delta`` is negative.
+    """
+    posts = [(group_id, pub_date) for group_id, pub_date in posts
+             if group_id is not None]
+    buckets = Counter(
+        (group_id, activity_day(pub_date)) for group_id, pub_date in posts
+    )
+    with transaction.atomic():
+        for (group_id, day), count in buckets.items():
+            shift_bucket(group_id, day, delta * count)
+
+        group_ids = {group_id for group_id, _ in posts}
+        if delta < 0:
+            Group.objects.filter(pk__in=group_ids).update(
+                last_post_date=newest_post_date()
+            )
+            return
+        for group_id in group_ids:
+            newest = max(date for pk, date in posts if pk == group_id)
+            Group.objects.filter(pk=group_id).filter(
+                Q(last_post_date__isnull=True)
+                | Q(last_post_date__lt=newest)
+            ).update(last_post_date=newest)
+
+
+def rebuild_group_activity(batch_size):
+    """Recompute the daily activity of the last ``GROUP_ACTIVITY_DAYS``
+    days and the last post dates of all groups from the posts."""
+    days = (
+        Post.objects.filter(group__isnull=False)
+        .annotate(day=TruncDate('pub_date'))
+        .filter(day__gte=activity_since())
+        .order_by()
+        .values('group', 'day')
+        .annotate(count=Count('pk'))
+        .values_list('group', 'day', 'count')
+    )
+    with transaction.atomic():
+        GroupActivity.objects.all().delete()
+        GroupActivity.objects.bulk_create(
+            (
+                GroupActivity(group_id=group_id, day=day, posts_count=count)
+                for group_id, day, count in days.iterator()
+            ),
+            batch_size=batch_size,
+        )
+        Group.objects.update(last_post_date=newest_post_date())
+
+
+def group_directory():
+    """Groups with the number of their posts of the last
+    ``GROUP_ACTIVITY_DAYS`` days, the busiest first."""
+    since = activity_since()
+    recent_posts = Subquery(
+        GroupActivity.objects.filter(group=OuterRef('pk'), day__gte=since)
+        .order_by()
+        .values('group')
+        .annotate(count=Sum('posts_count'))
+        .values('count'),
+        output_field=IntegerField(),
+    )
+    return Group.objects.annotate(
+        recent_posts_count=Coalesce(recent_posts, 0)
+    ).order_by('-posts_count', 'id')
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.admin import ModelAdmin
 
-from .models import Post, Group
+from .models import Follow, Post, Group
 
 
 class PostAdmin(ModelAdmin):
@@ -24,6 +24,8 @@ class GroupAdmin(ModelAdmin):
         'title',
         'slug',
         'description',
+        'posts_count',
+        'last_post_date',
     )
     search_fields = (
         'title',
@@ -32,5 +34,18 @@ class GroupAdmin(ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class FollowAdmin(ModelAdmin):
+    list_display = (
+        'pk',
+        'user',
+        'author',
+    )
+    search_fields = (
+        'user__username',
+        'author__username',
+    )
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(Follow, FollowAdmin)
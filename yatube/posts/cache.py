@@ -0,0 +1,238 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+FEED_PAGE_HITS_KEY = 'feed_page_cache:hits'
+FEED_PAGE_MISSES_KEY = 'feed_page_cache:misses'
+# Stale feed sizes are kept this long to be served during a recount
+FEED_COUNT_STALE_TIMEOUT = 60 * 60 * 24
+
+
+def feed_cache():
+    """Return the cache shared by all workers that feeds are kept in."""
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def feed_page_key(path, page):
+    return f'feed_page:{path}:{page}'
+
+
+def feed_validator_key(path):
+    return f'feed_validator:{path}'
+
+
+def feed_count_key(path):
+    return f'feed_count:{path}'
+
+
+def cached_page_number(request):
+    """Return the page number to cache ``request`` under, if any.
+
+    Only the first ``FEED_PAGE_CACHE_PAGES`` pages of a feed are cached,
+    because those are the only ones a new post is purged from.
+    """
+    if not settings.FEED_PAGE_CACHE_ENABLED:
+        return None
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    if set(request.GET) - {'page'}:
+        return None
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        return None
+    if not 1 <= page <= settings.FEED_PAGE_CACHE_PAGES:
+        return None
+    if request.user.is_authenticated:
+        return None
+    return page
+
+
+def count_lookup(key):
+    """Count a page cache lookup where every worker adds to the count."""
+    try:
+        feed_cache().incr(key)
+    except ValueError:
+        feed_cache().set(key, 1, None)
+
+
+def anonymous_page_cache(view_func):
+    """Serve the first pages of a feed to anonymous users from the cache.
+
+    Cached pages are purged by ``purge_feed_pages`` when a post in the
+    feed is created or edited.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        page = cached_page_number(request)
+        if page is None:
+            return view_func(request, *args, **kwargs)
+
+        key = feed_page_key(request.path, page)
+        cached = feed_cache().get(key)
+        if cached is not None:
+            count_lookup(FEED_PAGE_HITS_KEY)
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        count_lookup(FEED_PAGE_MISSES_KEY)
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == 200 and not response.cookies:
+            feed_cache().set(
+                key,
+                (response.content, response['Content-Type']),
+                settings.FEED_PAGE_CACHE_TIMEOUT,
+            )
+        return response
+    return wrapper
+
+
+def purge_feed_pages(paths):
+    """Forget the cached first pages of the feeds and bump their
+    versions."""
+    now = timezone.now()
+    feed_cache().set_many(
+        {feed_validator_key(path): now for path in paths},
+        settings.FEED_VALIDATOR_TIMEOUT,
+    )
+    if settings.FEED_PAGE_CACHE_ENABLED:
+        feed_cache().delete_many([
+            feed_page_key(path, page)
+            for path in paths
+            for page in range(1, settings.FEED_PAGE_CACHE_PAGES + 1)
+        ])
+
+
+def cached_feed_count(path, recount):
+    """Return the ``(count, approximate)`` size of the feed at ``path``.
+
+    ``recount()`` is called at most once per ``FEED_COUNT_TIMEOUT``.
+    When the cached size gets stale, the request that takes the refresh
+    lock recounts the feed while the others keep serving the stale size
+    instead of all running ``COUNT(*)`` at once.
+    """
+    if not settings.FEED_COUNT_CACHE_ENABLED:
+        return recount()
+
+    counts = feed_cache()
+    key = feed_count_key(path)
+    cached = counts.get(key)
+    if cached is not None:
+        count, approximate, fresh_until = cached
+        if fresh_until > time.time():
+            return count, approximate
+        if not counts.add(f'{key}:refresh', True, settings.FEED_COUNT_TIMEOUT):
+            return count, approximate
+
+    count, approximate = recount()
+    fresh_until = time.time() + settings.FEED_COUNT_TIMEOUT
+    counts.set(
+        key, (count, approximate, fresh_until), FEED_COUNT_STALE_TIMEOUT
+    )
+    counts.delete(f'{key}:refresh')
+    return count, approximate
+
+
+def adjust_feed_counts(paths, delta):
+    """Shift the cached sizes of the feeds a post was added to or left.
+
+    The sizes are shared by all workers, so the shift is seen by each.
+    """
+    counts = feed_cache()
+    cached = counts.get_many([feed_count_key(path) for path in paths])
+    counts.set_many({
+        key: (max(count + delta, 0), approximate, fresh_until)
+        for key, (count, approximate, fresh_until) in cached.items()
+    }, FEED_COUNT_STALE_TIMEOUT)
+
+
+def feed_version(path):
+    """Return the time the feed at ``path`` last changed.
+
+    ``purge_feed_pages`` bumps the version whenever a post of the feed,
+    its author or its group is written. Versions are kept in the feeds
+    cache, so every worker hands out the same ETag for a feed. A feed
+    without a cached version starts a new one, so an evicted version
+    only costs clients a full response.
+    """
+    versions = feed_cache()
+    key = feed_validator_key(path)
+    version = versions.get(key)
+    if version is None:
+        version = timezone.now()
+        if not versions.add(key, version, settings.FEED_VALIDATOR_TIMEOUT):
+            version = versions.get(key, version)
+    return version
+
+
+def feed_validator(request, counters):
+    """Return the version of the feed followed by its stored counters.
+
+    ``counters`` is a tuple of the denormalized post counters of the
+    feed, or ``None`` if the object the feed belongs to is missing. No
+    query runs over the posts themselves.
+    """
+    if counters is None:
+        return None
+    return (feed_version(request.path), *counters)
+
+
+def make_etag(request, *parts):
+    """Hash ``parts`` together with the page and the viewing user."""
+    user = request.user.pk if request.user.is_authenticated else ''
+    raw = ':'.join(str(part) for part in (
+        request.get_full_path(), user, *parts
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def conditional_view(get_validator):
+    """Answer conditional GETs with 304 before running the view.
+
+    ``get_validator(request, *args, **kwargs)`` returns a
+    ``(last_modified, *parts)`` tuple or ``None`` if the object is
+    missing. Last-Modified is only sent to anonymous users, because the
+    page of a logged in user also depends on who they are.
+    """
+    def validator(request, *args, **kwargs):
+        if not hasattr(request, 'page_validator'):
+            request.page_validator = get_validator(request, *args, **kwargs)
+        return request.page_validator
+
+    def etag(request, *args, **kwargs):
+        value = validator(request, *args, **kwargs)
+        return None if value is None else make_etag(request, *value)
+
+    def last_modified(request, *args, **kwargs):
+        value = validator(request, *args, **kwargs)
+        if value is None or request.user.is_authenticated:
+            return None
+        return value[0]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def conditional_feed(counters_for):
+    """``conditional_view`` for a feed whose stored counters
+    ``counters_for`` returns."""
+    def get_validator(request, *args, **kwargs):
+        return feed_validator(request, counters_for(*args, **kwargs))
+    return conditional_view(get_validator)
+
+
+def feed_page_stats():
+    stats = feed_cache().get_many([FEED_PAGE_HITS_KEY, FEED_PAGE_MISSES_KEY])
+    return {
+        'hits': stats.get(FEED_PAGE_HITS_KEY, 0),
+        'misses': stats.get(FEED_PAGE_MISSES_KEY, 0),
+    }
+
+
+def reset_feed_page_stats():
+    feed_cache().delete_many([FEED_PAGE_HITS_KEY, FEED_PAGE_MISSES_KEY])
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from users.checks import PROCESS_LOCAL_CACHES
+
+# Settings turning on caches kept in FEED_CACHE_ALIAS; feed versions are
+# always kept there, and are only safe per process under DEBUG
+FEED_CACHE_SETTINGS = (
+    'FEED_PAGE_CACHE_ENABLED',
+    'FEED_COUNT_CACHE_ENABLED',
+    'SYNDICATION_CACHE_ENABLED',
+)
+
+
+@register()
+def check_feed_cache(app_configs, **kwargs):
+    """Refuse a per-process feed cache: a write purges the cached feeds
+    of one worker only, and the others keep serving stale pages."""
+    enabled = [name for name in FEED_CACHE_SETTINGS if getattr(settings, name)]
+    if not enabled:
+        return []
+    backend = settings.CACHES[settings.FEED_CACHE_ALIAS]['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f'{", ".join(enabled)} needs a cache shared by all workers, but '
+        f'the {settings.FEED_CACHE_ALIAS!r} cache uses {backend}.',
+        hint='Set YATUBE_FEED_CACHE_DIR or configure a shared cache.',
+        id='posts.E001',
+    )]
@@ -0,0 +1,43 @@
+import csv
+import json
+
+EXPORT_COLUMNS = ('id', 'text', 'pub_date', 'author', 'group')
+EXPORT_FIELDS = ('id', 'text', 'pub_date', 'author__username', 'group__slug')
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_rows(posts, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the exported columns of ``posts`` without caching them."""
+    rows = (
+        posts.order_by('id')
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for post_id, text, pub_date, author, group in rows:
+        yield post_id, text, pub_date.isoformat(), author, group
+
+
+def export_jsonl(posts, chunk_size=EXPORT_CHUNK_SIZE):
+    for row in export_rows(posts, chunk_size):
+        record = dict(zip(EXPORT_COLUMNS, row))
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """File-like object handing every written line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(posts, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in export_rows(posts, chunk_size):
+        yield writer.writerow(row)
+
+
+EXPORT_FORMATS = {
+    'jsonl': (export_jsonl, 'application/x-ndjson; charset=utf-8'),
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+}
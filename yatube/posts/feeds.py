@@ -0,0 +1,168 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import truncatechars
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import parse_http_date_safe
+from django.views.decorators.gzip import gzip_page
+
+from .cache import feed_cache
+from .models import Group, Post
+
+User = get_user_model()
+
+FEED_ITEMS = 20
+
+
+def syndication_key(path):
+    return f'syndication:{path}'
+
+
+def cached_feed(feed_view):
+    """Render a syndication feed once and serve it from the cache.
+
+    The cached copy is kept in the feeds cache shared by all workers and
+    is dropped by ``purge_syndication`` when a post of the feed is
+    written. Responses carry ETag and Last-Modified and are
+    gzip-compressed for clients that accept it.
+    """
+    @wraps(feed_view)
+    def wrapper(request, *args, **kwargs):
+        key = syndication_key(request.path)
+        cached = None
+        if settings.SYNDICATION_CACHE_ENABLED:
+            cached = feed_cache().get(key)
+        if cached is None:
+            response = feed_view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            cached = (
+                response.content,
+                response['Content-Type'],
+                response.get('Last-Modified'),
+            )
+            if settings.SYNDICATION_CACHE_ENABLED:
+                feed_cache().set(
+                    key, cached, settings.SYNDICATION_CACHE_TIMEOUT
+                )
+
+        content, content_type, last_modified = cached
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        conditional = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified and parse_http_date_safe(
+                last_modified
+            ),
+        )
+        if conditional is not None:
+            return conditional
+
+        response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = last_modified
+        return response
+    return gzip_page(wrapper)
+
+
+def purge_syndication(paths):
+    feed_cache().delete_many([syndication_key(path) for path in paths])
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние обновления на сайте'
+    link = reverse_lazy('posts:index')
+    description = 'Новые посты всех авторов'
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).feed()[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return truncatechars(item.text, 50)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+    def description(self, obj):
+        return obj.description
+
+    def posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: посты {obj.get_full_name() or obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
+
+    def description(self, obj):
+        return f'Все посты пользователя {obj.username}'
+
+    def posts(self, obj):
+        return obj.posts.all()
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+index_rss = cached_feed(LatestPostsFeed())
+index_atom = cached_feed(LatestPostsAtomFeed())
+group_rss = cached_feed(GroupPostsFeed())
+group_atom = cached_feed(GroupPostsAtomFeed())
+profile_rss = cached_feed(AuthorPostsFeed())
+profile_atom = cached_feed(AuthorPostsAtomFeed())
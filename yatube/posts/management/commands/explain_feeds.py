@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts.models import Post
+from posts.utils import POSTS_PER_PAGE
+
+
+class Command(BaseCommand):
+    help = (
+        'Print the SQLite query plan of the index, group_list and profile '
+        'feed queries and check that they are served from an index.'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN needs an SQLite database.')
+
+        feeds = {
+            'index': Post.objects.feed(),
+            'group_list': Post.objects.feed().filter(group_id=0),
+            'profile': Post.objects.feed().filter(author_id=0),
+        }
+        failed = []
+        for name, queryset in feeds.items():
+            sql, params = queryset[:POSTS_PER_PAGE].query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [row[-1] for row in cursor.fetchall()]
+
+            indexed = self.uses_index(plan)
+            if not indexed:
+                failed.append(name)
+            status = (
+                self.style.SUCCESS('index') if indexed
+                else self.style.ERROR('not indexed')
+            )
+            self.stdout.write(f'{name}: {status}')
+            for detail in plan:
+                self.stdout.write(f'    {detail}')
+
+        if failed:
+            raise CommandError(
+                f'Not served from an index: {", ".join(failed)}'
+            )
+
+    @staticmethod
+    def uses_index(plan):
+        table = Post._meta.db_table
+        post_steps = [detail for detail in plan if f' {table}' in detail]
+        return (
+            not any('TEMP B-TREE' in detail for detail in plan)
+            and all('INDEX' in detail for detail in post_steps)
+        )
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Stream all posts of an author or a group as JSONL or CSV.'
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group(required=True)
+        scope.add_argument('--author', help='Username of the author.')
+        scope.add_argument('--group', help='Slug of the group.')
+        parser.add_argument(
+            '--format',
+            choices=tuple(EXPORT_FORMATS),
+            default='jsonl',
+        )
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='File to write to, or - for stdout.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Number of rows fetched from the database at a time.',
+        )
+
+    def handle(self, *args, **options):
+        if options['author']:
+            scope = {'author__username': options['author']}
+            exists = User.objects.filter(username=options['author']).exists()
+        else:
+            scope = {'group__slug': options['group']}
+            exists = Group.objects.filter(slug=options['group']).exists()
+        if not exists:
+            raise CommandError('No such author or group.')
+
+        export, _ = EXPORT_FORMATS[options['format']]
+        lines = export(
+            Post.objects.filter(**scope), chunk_size=options['chunk_size']
+        )
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as stream:
+            stream.writelines(lines)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.cache import feed_page_stats, reset_feed_page_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit and miss counters of the anonymous feed page cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after printing them.',
+        )
+
+    def handle(self, *args, **options):
+        stats = feed_page_stats()
+        lookups = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / lookups if lookups else 0
+        self.stdout.write(
+            f'hits: {stats["hits"]}\n'
+            f'misses: {stats["misses"]}\n'
+            f'hit ratio: {ratio:.1%}'
+        )
+        if options['reset']:
+            reset_feed_page_stats()
@@ -0,0 +1,177 @@
+import csv
+import json
+import sys
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.activity import change_group_activity
+from posts.models import Group, Post
+from posts.signals import change_posts_count, refresh_imported_feeds
+from posts.utils import insert_posts
+
+User = get_user_model()
+
+# Fields read from a record; each must be a string when present
+RECORD_FIELDS = ('text', 'author', 'group', 'pub_date')
+
+
+def parse_pub_date(value):
+    """Parse an ISO 8601 date, taking naive dates as UTC."""
+    try:
+        pub_date = parse_datetime(value)
+    except ValueError:
+        return None
+    if pub_date is not None and timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date, timezone.utc)
+    return pub_date
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream posts from a JSONL or CSV file (or stdin) into the '
+        'database. Every record needs `text` and `author` (a username) '
+        'and may have `group` (a slug) and `pub_date` (ISO 8601).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='File to import, or - to read from stdin.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=('jsonl', 'csv'),
+            help='Input format; guessed from the file extension if omitted.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of posts inserted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format']
+        if input_format is None:
+            input_format = 'csv' if path.endswith('.csv') else 'jsonl'
+
+        self.authors = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+        self.imported_authors = Counter()
+        self.imported_groups = Counter()
+
+        if path == '-':
+            self.import_stream(sys.stdin, input_format)
+        else:
+            try:
+                with open(path, encoding='utf-8', newline='') as stream:
+                    self.import_stream(stream, input_format)
+            except OSError as error:
+                raise CommandError(error)
+
+    def read_records(self, stream, input_format):
+        if input_format == 'csv':
+            yield from csv.DictReader(stream)
+            return
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+    def import_stream(self, stream, input_format):
+        started = time.monotonic()
+        imported = skipped = 0
+        batch = []
+        records = self.read_records(stream, input_format)
+        for number, record in enumerate(records, start=1):
+            post = self.build_post(record)
+            if post is None:
+                skipped += 1
+                if self.verbosity > 1:
+                    self.stderr.write(f'Skipped record {number}: {record}')
+                continue
+            batch.append(post)
+            if len(batch) >= self.batch_size:
+                imported += self.save_batch(batch)
+                batch = []
+                self.report(imported, started)
+        if batch:
+            imported += self.save_batch(batch)
+        # The posts were inserted without signals, so their feeds are
+        # purged here once for the whole import
+        refresh_imported_feeds(self.imported_authors, self.imported_groups)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} posts, skipped {skipped}, '
+            f'in {elapsed:.1f}s ({imported / (elapsed or 1):.0f} rows/s).'
+        ))
+
+    def build_post(self, record):
+        if not isinstance(record, dict):
+            return None
+        values = [record.get(field) for field in RECORD_FIELDS]
+        if any(
+            value is not None and not isinstance(value, str)
+            for value in values
+        ):
+            return None
+        text, author, group, pub_date = values
+
+        author_id = self.authors.get(author)
+        if author_id is None or not text:
+            return None
+
+        group_id = None
+        if group:
+            group_id = self.groups.get(group)
+            if group_id is None:
+                return None
+
+        pub_date = parse_pub_date(pub_date) if pub_date else timezone.now()
+        if pub_date is None:
+            return None
+
+        return Post(
+            text=text,
+            author_id=author_id,
+            group_id=group_id,
+            pub_date=pub_date,
+        )
+
+    def save_batch(self, batch):
+        authors = Counter(post.author_id for post in batch)
+        groups = Counter(
+            post.group_id for post in batch if post.group_id is not None
+        )
+        with transaction.atomic():
+            insert_posts(batch)
+            self.imported_authors.update(authors)
+            self.imported_groups.update(groups)
+            for author_id, count in authors.items():
+                change_posts_count(count, author_id=author_id)
+            for group_id, count in groups.items():
+                change_posts_count(count, group_id=group_id)
+            change_group_activity(
+                1, [(post.group_id, post.pub_date) for post in batch]
+            )
+        return len(batch)
+
+    def report(self, imported, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Imported {imported} posts '
+            f'({imported / (elapsed or 1):.0f} rows/s)'
+        )
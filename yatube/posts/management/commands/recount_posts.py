@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.activity import rebuild_group_activity
+from posts.models import Group, GroupActivity, Post
+from posts.utils import capped_batch_size
+from users.models import Profile
+
+User = get_user_model()
+
+
+def count_posts(field, outer_field):
+    return Coalesce(Subquery(
+        Post.objects.filter(**{field: OuterRef(outer_field)})
+        .order_by()
+        .values(field)
+        .annotate(count=Count('pk'))
+        .values('count')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the stored post counters of all authors and groups '
+        'and the daily activity of the groups.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of rows to create per query.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            missing = User.objects.filter(
+                profile__isnull=True
+            ).values_list('pk', flat=True)
+            Profile.objects.bulk_create(
+                (Profile(user_id=user_id) for user_id in missing),
+                batch_size=capped_batch_size(Profile, options['batch_size']),
+            )
+            profiles = Profile.objects.update(
+                posts_count=count_posts('author', 'user')
+            )
+            groups = Group.objects.update(
+                posts_count=count_posts('group', 'pk')
+            )
+            rebuild_group_activity(
+                capped_batch_size(GroupActivity, options['batch_size'])
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted posts of {profiles} authors and {groups} groups.'
+        ))
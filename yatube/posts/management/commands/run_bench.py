@@ -0,0 +1,196 @@
+import json
+import math
+import subprocess
+import threading
+import time
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from core.middleware.metrics import QueryTimer
+from posts.models import Group, Post
+
+User = get_user_model()
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of sorted ``values``."""
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def commit_hash():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive every posts and users page with concurrent in-process '
+        'clients and print latency percentiles, throughput and queries '
+        'per request as JSON. Run seed_bench first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Number of requests sent to every page.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help='Number of concurrent clients.',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Requests sent to every page before measuring.',
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write the JSON report to instead of stdout.',
+        )
+
+    def handle(self, *args, **options):
+        scenarios = self.scenarios()
+        results = [
+            self.run_scenario(name, url, user, options)
+            for name, url, user in scenarios
+        ]
+        report = json.dumps({
+            'commit': commit_hash(),
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'results': results,
+        }, ensure_ascii=False, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    def scenarios(self):
+        """Return ``(name, url, user)`` of the pages to measure.
+
+        The busiest group and author are used so the numbers reflect the
+        worst feeds. Logging out and the emailed password reset link are
+        left out.
+        """
+        post = Post.objects.order_by('-pk').select_related('author').first()
+        group = Group.objects.order_by('-posts_count').first()
+        author = User.objects.order_by('-profile__posts_count').first()
+        if post is None or group is None:
+            raise CommandError('No posts to measure, run seed_bench first.')
+        word = post.text.split()[0]
+
+        pages = (
+            ('posts:index', {}, '', None),
+            ('posts:index', {}, '?page=2', None),
+            ('posts:group_index', {}, '', None),
+            ('posts:group_list', {'slug': group.slug}, '', None),
+            ('posts:profile', {'username': author.username}, '', None),
+            ('posts:post_detail', {'post_id': post.pk}, '', None),
+            ('posts:search', {}, f'?q={word}', None),
+            ('posts:index_rss', {}, '', None),
+            ('posts:group_atom', {'slug': group.slug}, '', None),
+            ('posts:post_create', {}, '', post.author),
+            ('posts:post_edit', {'post_id': post.pk}, '', post.author),
+            ('users:signup', {}, '', None),
+            ('users:login', {}, '', None),
+            ('users:password_change', {}, '', post.author),
+            ('users:password_change_done', {}, '', post.author),
+            ('users:password_reset', {}, '', None),
+            ('users:password_reset_done', {}, '', None),
+            ('users:password_reset_complete', {}, '', None),
+        )
+        return [
+            (name, reverse(name, kwargs=kwargs) + query, user)
+            for name, kwargs, query, user in pages
+        ]
+
+    def drive(self, url, user, requests, warmup):
+        """Send ``requests`` GETs from one client; return the latency and
+        the number of queries of each and the number of failures."""
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        for _ in range(warmup):
+            client.get(url)
+
+        timer = QueryTimer()
+        samples = []
+        failed = 0
+        for _ in range(requests):
+            queries = timer.queries
+            started = time.perf_counter()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                try:
+                    status = client.get(url).status_code
+                except Exception:
+                    status = 500
+            samples.append(
+                (time.perf_counter() - started, timer.queries - queries)
+            )
+            failed += status >= 400
+        return samples, failed
+
+    def run_scenario(self, name, url, user, options):
+        concurrency = max(options['concurrency'], 1)
+        args = (
+            url, user,
+            math.ceil(options['requests'] / concurrency), options['warmup'],
+        )
+        outcomes = []
+
+        def drive_and_close():
+            try:
+                outcomes.append(self.drive(*args))
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        if concurrency == 1:
+            outcomes.append(self.drive(*args))
+        else:
+            threads = [
+                threading.Thread(target=drive_and_close)
+                for _ in range(concurrency)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        wall = time.perf_counter() - started
+
+        samples = [sample for done, _ in outcomes for sample in done]
+        latencies = sorted(elapsed for elapsed, _ in samples)
+        queries = sum(count for _, count in samples)
+        result = {
+            'name': name,
+            'url': url,
+            'requests': len(samples),
+            'errors': sum(failed for _, failed in outcomes),
+            'throughput': round(len(samples) / wall, 1),
+            'latency_ms': {
+                f'p{percent}': round(percentile(latencies, percent) * 1000, 2)
+                for percent in PERCENTILES
+            },
+            'queries_per_request': round(queries / len(samples), 2),
+        }
+        self.stderr.write(
+            f'{name} {url}: {result["throughput"]} req/s, '
+            f'p95 {result["latency_ms"]["p95"]} ms'
+        )
+        return result
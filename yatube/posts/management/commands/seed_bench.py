@@ -0,0 +1,175 @@
+import datetime
+import itertools
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from faker import Faker
+
+from posts.models import Group, Post
+from posts.utils import insert_posts
+
+User = get_user_model()
+
+BENCH_PASSWORD = 'bench-password'
+# Share of posts that belong to no group
+UNGROUPED_SHARE = 0.3
+# Number of distinct texts the posts are drawn from
+TEXT_POOL_SIZE = 2000
+
+
+def zipf_weights(size, exponent):
+    """Cumulative weights under which rank ``n`` is drawn ``n ** -s``
+    times as often as the first."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with synthetic users, groups and posts for '
+        'benchmarks. Authors and groups get Zipf-skewed post counts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=100000,
+            help='Number of users to create.',
+        )
+        parser.add_argument(
+            '--groups', type=int, default=5000,
+            help='Number of groups to create.',
+        )
+        parser.add_argument(
+            '--posts', type=int, default=1000000,
+            help='Number of posts to create.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='The posts are spread over this many last days.',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Exponent of the Zipf skew of authors and groups.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Number of rows inserted per query.',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed of the random generators.',
+        )
+
+    def handle(self, *args, **options):
+        self.started = time.monotonic()
+        self.batch_size = options['batch_size']
+        self.random = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+
+        author_ids = self.create_users(options['users'])
+        group_ids = self.create_groups(options['groups'])
+        self.create_posts(options, author_ids, group_ids)
+        call_command('recount_posts', stdout=self.stdout)
+        self.report('Recounted post counters')
+
+    def report(self, message):
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(f'{message} ({elapsed:.1f}s)')
+
+    def batches(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def create_users(self, count):
+        password = make_password(BENCH_PASSWORD)
+        first_id = (User.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0) + 1
+        users = (
+            User(
+                username=f'{self.fake.user_name()}_{first_id + number}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                password=password,
+            )
+            for number in range(count)
+        )
+        for batch in self.batches(users):
+            User.objects.bulk_create(batch)
+        self.report(f'Created {count} users')
+        return list(User.objects.order_by('pk').values_list('pk', flat=True))
+
+    def create_groups(self, count):
+        first_id = (Group.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0) + 1
+        groups = (
+            Group(
+                title=self.fake.catch_phrase()[:200],
+                slug=f'group-{first_id + number}',
+                description=self.fake.paragraph(),
+            )
+            for number in range(count)
+        )
+        for batch in self.batches(groups):
+            Group.objects.bulk_create(batch)
+        self.report(f'Created {count} groups')
+        return list(Group.objects.order_by('pk').values_list('pk', flat=True))
+
+    def create_posts(self, options, author_ids, group_ids):
+        count = options['posts']
+        if not count or not author_ids:
+            return
+        texts = [
+            self.fake.paragraph(nb_sentences=self.random.randint(1, 8))
+            for _ in range(TEXT_POOL_SIZE)
+        ]
+        # Shuffle so that the most active authors are not the oldest
+        authors = self.random.sample(author_ids, len(author_ids))
+        author_weights = zipf_weights(len(authors), options['skew'])
+        groups = self.random.sample(group_ids, len(group_ids))
+        group_weights = zipf_weights(len(groups), options['skew'])
+
+        span = datetime.timedelta(days=options['days'])
+        start = timezone.now() - span
+        step = span / count
+
+        created = 0
+        for batch_start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - batch_start)
+            batch_authors = self.random.choices(
+                authors, cum_weights=author_weights, k=size
+            )
+            batch_groups = [None] * size
+            if groups:
+                batch_groups = [
+                    None if self.random.random() < UNGROUPED_SHARE else group
+                    for group in self.random.choices(
+                        groups, cum_weights=group_weights, k=size
+                    )
+                ]
+            batch = [
+                Post(
+                    text=self.random.choice(texts),
+                    author_id=author_id,
+                    group_id=group_id,
+                    pub_date=start + step * (batch_start + number),
+                )
+                for number, (author_id, group_id) in enumerate(
+                    zip(batch_authors, batch_groups)
+                )
+            ]
+            insert_posts(batch)
+            created += size
+            self.report(f'Created {created} of {count} posts')
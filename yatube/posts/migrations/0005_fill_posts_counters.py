@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_posts_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Profile = apps.get_model('users', 'Profile')
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+
+    Profile.objects.bulk_create(
+        Profile(user_id=user_id)
+        for user_id in User.objects.filter(
+            profile__isnull=True
+        ).values_list('pk', flat=True)
+    )
+
+    def count_posts(field, outer_field):
+        return Coalesce(Subquery(
+            Post.objects.filter(**{field: OuterRef(outer_field)})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count')
+        ), 0)
+
+    Profile.objects.update(posts_count=count_posts('author', 'user'))
+    Group.objects.update(posts_count=count_posts('group', 'pk'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_group_posts_count'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_posts_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_fill_posts_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='card_version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Версия карточки'),
+        ),
+    ]
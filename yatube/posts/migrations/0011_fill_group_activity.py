@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import TruncDate
+
+
+def fill_group_activity(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupActivity = apps.get_model('posts', 'GroupActivity')
+    Post = apps.get_model('posts', 'Post')
+
+    days = (
+        Post.objects.filter(group__isnull=False)
+        .annotate(day=TruncDate('pub_date'))
+        .order_by()
+        .values('group', 'day')
+        .annotate(count=Count('pk'))
+        .values_list('group', 'day', 'count')
+    )
+    GroupActivity.objects.bulk_create(
+        (
+            GroupActivity(group_id=group_id, day=day, posts_count=count)
+            for group_id, day, count in days.iterator()
+        ),
+        batch_size=500,
+    )
+    Group.objects.update(last_post_date=Subquery(
+        Post.objects.filter(group=OuterRef('pk'))
+        .order_by('-pub_date', '-id')
+        .values('pub_date')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_group_activity'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_group_activity, migrations.RunPython.noop),
+    ]
@@ -21,9 +21,63 @@ class Group(Model):
         blank=True,
     )
 
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False,
+    )
+
+    last_post_date = models.DateTimeField(
+        'Дата последнего поста',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+
     def __str__(self) -> str:
         return f'{self.title}'
 
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('-posts_count', 'id'),
+                name='group_directory_idx',
+            ),
+        )
+
+
+class GroupActivity(Model):
+    """The number of posts published in a group on one day.
+
+    The rows are shifted together with ``Group.posts_count``, so the
+    group directory sums a few of them instead of counting posts.
+    """
+
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='activity',
+        verbose_name='Группа',
+    )
+
+    day = models.DateField('День')
+
+    posts_count = models.IntegerField('Количество постов', default=0)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('group', 'day'),
+                name='unique_group_activity_day',
+            ),
+        )
+
+
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Posts ready to be rendered as feed cards."""
+        return self.select_related('author', 'group')
+
 
 class Post(Model):
     text = models.TextField(
@@ -36,6 +90,11 @@ class Post(Model):
         auto_now_add=True,
     )
 
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+    )
+
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -53,8 +112,105 @@ class Post(Model):
         help_text='Выберите группу',
     )
 
+    card_version = models.PositiveIntegerField(
+        'Версия карточки',
+        default=1,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
+
     def __str__(self) -> str:
         return f'{self.text[:15]}'
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_feed_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_feed_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx',
+            ),
+        )
+
+
+class Follow(Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик',
+    )
+
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор',
+    )
+
+    def __str__(self) -> str:
+        return f'{self.user} → {self.author}'
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('author', 'user'),
+                name='follow_author_idx',
+            ),
+        )
+
+
+class TimelineEntry(Model):
+    """A post of a followed author, copied into the follower's timeline.
+
+    ``pub_date`` repeats the date of the post so a page of the follow
+    feed is one range scan of ``timeline_feed_idx``.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_feed_idx',
+            ),
+        )
@@ -0,0 +1,213 @@
+import base64
+import binascii
+import datetime
+import json
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .cache import cached_feed_count
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage(Sequence):
+    cursor_based = True
+
+    def __init__(self, object_list, paginator,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset pagination over an ordered queryset.
+
+    Pages are addressed by opaque cursors holding the ordering key of
+    the row next to the page boundary, so fetching any page is a single
+    indexed range query with no ``COUNT(*)`` and no ``OFFSET``. The last
+    ordering field must be unique to make the key total.
+    """
+
+    ordering = ('-pub_date', '-id')
+
+    def __init__(self, object_list, per_page, ordering=None, strict=False):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        self.strict = strict
+
+    def get_page(self, cursor):
+        """Return the page for ``cursor``, or the first page if the
+        cursor is missing, malformed or points past the data.
+
+        A ``strict`` paginator raises ``InvalidCursor`` for a malformed
+        cursor instead and returns an empty last page for a cursor past
+        the data, so a page never costs more than one query.
+        """
+        position, backwards = self._position(cursor)
+        try:
+            rows, has_more = self._fetch(position, backwards)
+        except (ValidationError, TypeError, ValueError):
+            # A well-formed cursor can still hold values the ordering
+            # fields cannot be compared with
+            if self.strict:
+                raise InvalidCursor(cursor)
+            rows, has_more = [], False
+        if not rows and position is not None:
+            if self.strict:
+                return CursorPage([], self)
+            return self.get_page(None)
+
+        # Walking backwards we came from the next page; walking forwards
+        # from any cursor we came from the previous one.
+        has_next = backwards or has_more
+        has_previous = has_more if backwards else position is not None
+        return CursorPage(
+            self._page_items(rows),
+            self,
+            self.encode_cursor(rows[-1]) if has_next else None,
+            self.encode_cursor(rows[0], backwards=True)
+            if has_previous else None,
+        )
+
+    def _position(self, cursor):
+        if not cursor:
+            return None, False
+        try:
+            return self.decode_cursor(cursor)
+        except InvalidCursor:
+            if self.strict:
+                raise
+            return None, False
+
+    def _fetch(self, position, backwards):
+        return self._fetch_from(
+            self.object_list, self.ordering, position, backwards
+        )
+
+    def _fetch_from(self, queryset, ordering, position, backwards):
+        if backwards:
+            ordering = tuple(self._flip(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(position, ordering))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+        return rows, has_more
+
+    def _page_items(self, rows):
+        """Turn the fetched rows into the objects shown on the page."""
+        return rows
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _after(position, ordering):
+        """Build the row-value comparison ``(f1, f2, ...) > position``
+        with the direction of every field taken from ``ordering``."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _key(self, obj):
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(obj, dict):
+            return [obj[name] for name in names]
+        return [getattr(obj, name) for name in names]
+
+    def encode_cursor(self, obj, backwards=False):
+        key = [
+            value.isoformat() if isinstance(value, datetime.datetime)
+            else value
+            for value in self._key(obj)
+        ]
+        payload = json.dumps({'k': key, 'b': int(backwards)},
+                             separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode())
+        return token.decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded))
+            key = payload['k']
+            backwards = bool(payload['b'])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor(cursor)
+        if not isinstance(key, list) or len(key) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        if not all(self._valid_key_value(value) for value in key):
+            raise InvalidCursor(cursor)
+        return key, backwards
+
+    @staticmethod
+    def _valid_key_value(value):
+        """Ordering keys are encoded as strings or integers only."""
+        return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator taking the size of the feed at ``path`` from the cache.
+
+    Feeds whose stored post counter ``estimate()`` is above
+    ``FEED_EXACT_COUNT_LIMIT`` are not counted at all: the estimate is
+    used instead and ``approximate`` is set.
+    """
+
+    def __init__(self, object_list, per_page, path, estimate=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.path = path
+        self.estimate = estimate
+        self.approximate = False
+
+    @cached_property
+    def count(self):
+        count, self.approximate = cached_feed_count(self.path, self.recount)
+        return count
+
+    def recount(self):
+        if self.estimate is not None:
+            estimate = self.estimate()
+            if estimate > settings.FEED_EXACT_COUNT_LIMIT:
+                return estimate, True
+        return self.object_list.count(), False
@@ -0,0 +1,119 @@
+import re
+
+from django.db import connection
+
+from .models import Post
+
+SEARCH_TABLE = 'posts_post_fts'
+
+CREATE_TABLE_SQL = f'''
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+    text, content='posts_post', content_rowid='id'
+)
+'''
+
+# posts_post is rebuilt by SQLite schema changes, which drops its
+# triggers, so they are created again after every migrate.
+CREATE_TRIGGERS_SQL = (
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE} (rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {SEARCH_TABLE} (rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+)
+
+DROP_SQL = (
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_update',
+    f'DROP TABLE IF EXISTS {SEARCH_TABLE}',
+)
+
+
+def install_search_index(using_connection=connection):
+    if using_connection.vendor != 'sqlite':
+        return
+    with using_connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+        for statement in CREATE_TRIGGERS_SQL:
+            cursor.execute(statement)
+
+
+def restore_search_triggers(using_connection=connection):
+    tables = using_connection.introspection.table_names()
+    if using_connection.vendor == 'sqlite' and SEARCH_TABLE in tables:
+        install_search_index(using_connection)
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query matching all of its words."""
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+class SearchResults:
+    """Posts matching a query, best ranked first.
+
+    Behaves like a sliceable sequence with ``count()`` so it can be
+    handed to ``Paginator``; each page costs one ranked FTS lookup by
+    rowid plus one query for the posts themselves.
+    """
+
+    def __init__(self, query):
+        self.match = match_expression(query)
+
+    def count(self):
+        if not self.match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s',
+                [self.match],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if not self.match:
+            return []
+        start = index.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s '
+                f'ORDER BY bm25({SEARCH_TABLE}), rowid DESC '
+                f'LIMIT %s OFFSET %s',
+                [self.match, index.stop - start, start],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query):
+    if not query.strip():
+        return Post.objects.none()
+    if connection.vendor == 'sqlite':
+        return SearchResults(query)
+    return Post.objects.feed().filter(text__icontains=query)
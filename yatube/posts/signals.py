@@ -0,0 +1,365 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+from django.urls import reverse
+
+from core.tasks import enqueue
+from users.models import Profile
+
+from .activity import change_group_activity
+from .cache import adjust_feed_counts, purge_feed_pages
+from .feeds import purge_syndication
+from .models import Follow, Group, Post
+from .timeline import (
+    backfill_timeline, clear_timeline, fan_out_post, switch_fan_out_mode
+)
+
+User = get_user_model()
+
+# Fields of related rows that are rendered into a cached post card
+CARD_AUTHOR_FIELDS = ('username', 'first_name', 'last_name')
+CARD_GROUP_FIELDS = ('slug',)
+# Fields of a group shown above the posts of its feed
+GROUP_PAGE_FIELDS = ('title', 'description')
+# Syndication feeds of every feed page
+SYNDICATION_FEEDS = {
+    'posts:index': ('posts:index_rss', 'posts:index_atom'),
+    'posts:profile': ('posts:profile_rss', 'posts:profile_atom'),
+    'posts:group_list': ('posts:group_rss', 'posts:group_atom'),
+}
+
+
+def change_posts_count(delta, author_id=None, group_id=None):
+    """Shift the stored post counters of an author and a group."""
+    with transaction.atomic():
+        if author_id is not None:
+            Profile.objects.filter(user_id=author_id).update(
+                posts_count=F('posts_count') + delta
+            )
+        if group_id is not None:
+            Group.objects.filter(pk=group_id).update(
+                posts_count=F('posts_count') + delta
+            )
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_group(sender, instance, raw=False, **kwargs):
+    instance._previous_group_id = None
+    if instance.pk is not None and not raw:
+        instance._previous_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        change_posts_count(
+            1, author_id=instance.author_id, group_id=instance.group_id
+        )
+        change_group_activity(1, [(instance.group_id, instance.pub_date)])
+        transaction.on_commit(partial(
+            shift_feed_counts, 1, instance.author_id, [instance.group_id]
+        ))
+        return
+    previous_group_id = instance._previous_group_id
+    if previous_group_id != instance.group_id:
+        with transaction.atomic():
+            change_posts_count(-1, group_id=previous_group_id)
+            change_posts_count(1, group_id=instance.group_id)
+            change_group_activity(
+                -1, [(previous_group_id, instance.pub_date)]
+            )
+            change_group_activity(1, [(instance.group_id, instance.pub_date)])
+        transaction.on_commit(partial(
+            shift_feed_counts, -1, group_ids=[previous_group_id], index=False
+        ))
+        transaction.on_commit(partial(
+            shift_feed_counts, 1, group_ids=[instance.group_id], index=False
+        ))
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    change_posts_count(
+        -1, author_id=instance.author_id, group_id=instance.group_id
+    )
+    change_group_activity(-1, [(instance.group_id, instance.pub_date)])
+    transaction.on_commit(partial(
+        shift_feed_counts, -1, instance.author_id, [instance.group_id]
+    ))
+
+
+def feed_scopes(author_id=None, group_ids=(), index=True):
+    """Return ``(url name, kwargs)`` of the feeds showing given posts."""
+    scopes = [('posts:index', {})] if index else []
+    scopes += [
+        ('posts:profile', {'username': username})
+        for username in User.objects.filter(
+            pk=author_id
+        ).values_list('username', flat=True)
+    ]
+    scopes += [
+        ('posts:group_list', {'slug': slug})
+        for slug in Group.objects.filter(
+            pk__in=group_ids
+        ).values_list('slug', flat=True)
+    ]
+    return scopes
+
+
+def purge_scopes(scopes):
+    """Drop the cached pages and syndication feeds of ``scopes``."""
+    purge_feed_pages([reverse(name, kwargs=kwargs) for name, kwargs in scopes])
+    purge_syndication([
+        reverse(feed_name, kwargs=kwargs)
+        for name, kwargs in scopes
+        for feed_name in SYNDICATION_FEEDS[name]
+    ])
+
+
+def purge_post_feeds(author_id, group_ids):
+    """Drop the cached pages and syndication feeds showing a post."""
+    purge_scopes(feed_scopes(author_id, group_ids))
+    if group_ids:
+        purge_feed_pages([reverse('posts:group_index')])
+
+
+def shift_feed_counts(delta, author_id=None, group_ids=(), index=True):
+    """Shift the cached sizes of the feeds showing given posts."""
+    scopes = feed_scopes(author_id, group_ids, index)
+    adjust_feed_counts(
+        [reverse(name, kwargs=kwargs) for name, kwargs in scopes], delta
+    )
+
+
+def refresh_imported_feeds(authors, groups):
+    """Purge the feeds of posts inserted without signals and shift
+    their cached sizes.
+
+    ``authors`` and ``groups`` count the new posts by author and group
+    id.
+    """
+    scopes = [('posts:index', {}, sum(authors.values()))]
+    scopes += [
+        ('posts:profile', {'username': username}, authors[pk])
+        for pk, username in User.objects.filter(
+            pk__in=authors
+        ).values_list('pk', 'username')
+    ]
+    scopes += [
+        ('posts:group_list', {'slug': slug}, groups[pk])
+        for pk, slug in Group.objects.filter(
+            pk__in=groups
+        ).values_list('pk', 'slug')
+    ]
+    purge_scopes([(name, kwargs) for name, kwargs, delta in scopes])
+    if groups:
+        purge_feed_pages([reverse('posts:group_index')])
+    for name, kwargs, delta in scopes:
+        adjust_feed_counts([reverse(name, kwargs=kwargs)], delta)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_feeds_on_commit(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    group_ids = {
+        instance.group_id,
+        getattr(instance, '_previous_group_id', None),
+    } - {None}
+    transaction.on_commit(
+        partial(purge_post_feeds, instance.author_id, group_ids)
+    )
+
+
+def purge_group_directory(delta=0, slugs=()):
+    """Drop the cached directory pages and shift its cached size.
+
+    The feeds of the groups at ``slugs`` are dropped too, because their
+    pages show the title and the description listed in the directory.
+    """
+    path = reverse('posts:group_index')
+    purge_feed_pages([path])
+    purge_scopes([('posts:group_list', {'slug': slug}) for slug in slugs])
+    if delta:
+        adjust_feed_counts([path], delta)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def purge_group_directory_on_commit(sender, instance, signal, raw=False,
+                                    created=False, **kwargs):
+    if raw:
+        return
+    delta = 0
+    if signal is post_delete:
+        delta = -1
+    elif created:
+        delta = 1
+    previous_slug = getattr(instance, '_changed_fields', {}).get('slug')
+    slugs = {instance.slug, previous_slug} - {None}
+    transaction.on_commit(partial(purge_group_directory, delta, slugs))
+
+
+def changed_fields(instance, fields, update_fields=None):
+    """Return the stored values of the ``fields`` that saving
+    ``instance`` changes."""
+    if instance.pk is None:
+        return {}
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    if not fields:
+        return {}
+    stored = (
+        type(instance)._default_manager
+        .filter(pk=instance.pk)
+        .values(*fields)
+        .first()
+    ) or {}
+    return {
+        field: value for field, value in stored.items()
+        if getattr(instance, field) != value
+    }
+
+
+@receiver(pre_save, sender=Post)
+def bump_card_version(sender, instance, raw=False, update_fields=None,
+                      **kwargs):
+    if raw or instance.pk is None:
+        return
+    if update_fields is None or 'card_version' in update_fields:
+        instance.card_version += 1
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Group)
+def remember_changed_fields(sender, instance, raw=False, update_fields=None,
+                            **kwargs):
+    fields = (
+        CARD_GROUP_FIELDS + GROUP_PAGE_FIELDS
+        if sender is Group else CARD_AUTHOR_FIELDS
+    )
+    instance._changed_fields = (
+        {} if raw else changed_fields(instance, fields, update_fields)
+    )
+
+
+def purge_author_feeds(author_id, previous_username=None):
+    """Drop the cached pages and syndication feeds showing an author's
+    posts."""
+    group_ids = set(
+        Post.objects.filter(author_id=author_id)
+        .values_list('group_id', flat=True)
+        .distinct()
+    ) - {None}
+    scopes = feed_scopes(author_id, group_ids)
+    if previous_username:
+        scopes.append(('posts:profile', {'username': previous_username}))
+    purge_scopes(scopes)
+
+
+def group_feed_scopes(group_id):
+    """Return the scopes of every feed showing the posts of a group."""
+    return feed_scopes(group_ids=[group_id]) + [
+        ('posts:profile', {'username': username})
+        for username in User.objects.filter(
+            posts__group_id=group_id
+        ).distinct().values_list('username', flat=True)
+    ]
+
+
+def purge_group_feeds(group_id):
+    """Drop the cached pages and syndication feeds showing the cards of
+    a group's posts."""
+    purge_scopes(group_feed_scopes(group_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def purge_changed_feeds_on_commit(sender, instance, raw=False, **kwargs):
+    changed = getattr(instance, '_changed_fields', {})
+    if raw or not changed:
+        return
+    if sender is Group:
+        # The group's own feed is purged with the group directory
+        if not set(changed) & set(CARD_GROUP_FIELDS):
+            return
+        purge = partial(purge_group_feeds, instance.pk)
+    else:
+        purge = partial(
+            purge_author_feeds, instance.pk, changed.get('username')
+        )
+    transaction.on_commit(purge)
+
+
+@receiver(pre_delete, sender=Group)
+def refresh_cards_of_deleted_group(sender, instance, **kwargs):
+    """Purge the feeds of the posts a deleted group leaves.
+
+    The posts lose their group by ``SET_NULL``, which sends no signals,
+    so their cached feeds would keep linking to the group. Their cards
+    are keyed by the group, so those are rendered anew.
+    """
+    scopes = group_feed_scopes(instance.pk)
+    transaction.on_commit(partial(purge_scopes, scopes))
+
+
+@receiver(post_save, sender=Post)
+def queue_fan_out(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        enqueue(fan_out_post, post_id=instance.pk)
+
+
+def change_followers_count(author_id, delta):
+    """Shift the follower counter of an author.
+
+    When the counter crosses ``FOLLOW_FANOUT_LIMIT`` the author moves
+    between the pushed and the pulled mode, and the timelines of the
+    followers are migrated by ``switch_fan_out_mode``.
+    """
+    Profile.objects.filter(user_id=author_id).update(
+        followers_count=F('followers_count') + delta
+    )
+    count = Profile.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    if count is None:
+        return
+    limit = settings.FOLLOW_FANOUT_LIMIT
+    if (count > limit) != (count - delta > limit):
+        enqueue(switch_fan_out_mode, author_id=author_id)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    change_followers_count(instance.author_id, 1)
+    enqueue(
+        backfill_timeline,
+        user_id=instance.user_id,
+        author_id=instance.author_id,
+    )
+
+
+@receiver(post_delete, sender=Follow)
+def count_unfollow(sender, instance, **kwargs):
+    change_followers_count(instance.author_id, -1)
+    enqueue(
+        clear_timeline,
+        user_id=instance.user_id,
+        author_id=instance.author_id,
+    )
@@ -0,0 +1,37 @@
+from django import template
+
+register = template.Library()
+
+PAGE_WINDOW = 2
+PAGE_ENDS = 1
+
+
+def page_window(number, num_pages, on_each_side=PAGE_WINDOW,
+                on_ends=PAGE_ENDS):
+    """Return the page numbers to link to from page ``number``.
+
+    The first and last ``on_ends`` pages and ``on_each_side`` pages
+    around the current one are shown, and every run of skipped pages is
+    replaced by ``None``. Only the shown numbers are generated, so the
+    cost does not grow with the number of pages.
+    """
+    shown = sorted({
+        *range(1, min(on_ends, num_pages) + 1),
+        *range(max(number - on_each_side, 1),
+               min(number + on_each_side, num_pages) + 1),
+        *range(max(num_pages - on_ends + 1, 1), num_pages + 1),
+    })
+    pages = []
+    for page in shown:
+        if pages and page - pages[-1] == 2:
+            # An ellipsis would hide a single page, so show it instead
+            pages.append(page - 1)
+        elif pages and page - pages[-1] > 2:
+            pages.append(None)
+        pages.append(page)
+    return pages
+
+
+@register.simple_tag
+def page_links(page_obj):
+    return page_window(page_obj.number, page_obj.paginator.num_pages)
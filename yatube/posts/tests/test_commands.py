@@ -0,0 +1,214 @@
+import datetime
+import json
+import os
+import tempfile
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..cache import feed_cache, feed_count_key, feed_version
+from ..feeds import syndication_key
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ExplainFeedsCommandTests(TestCase):
+    def test_feeds_are_served_from_indexes(self):
+        out = StringIO()
+        call_command('explain_feeds', stdout=out)
+        output = out.getvalue()
+        for feed in ('index', 'group_list', 'profile'):
+            with self.subTest(feed=feed):
+                self.assertIn(f'{feed}: index', output)
+        self.assertNotIn('TEMP B-TREE', output)
+
+
+class ImportPostsCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author_test_name')
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group-test-slug',
+        )
+
+    def import_posts(self, content, suffix):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix=suffix, encoding='utf-8', delete=False
+        ) as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, stream.name)
+        call_command(
+            'import_posts', stream.name, batch_size=2, stdout=StringIO()
+        )
+
+    def test_import_jsonl(self):
+        records = (
+            {'text': 'Первый', 'author': 'author_test_name',
+             'group': 'group-test-slug',
+             'pub_date': '2020-01-02T03:04:05+00:00'},
+            {'text': 'Второй', 'author': 'author_test_name'},
+            {'text': 'Третий', 'author': 'author_test_name'},
+            {'text': 'Без автора', 'author': 'not_existed'},
+        )
+        content = '\n'.join(json.dumps(record) for record in records)
+        self.import_posts(content + '\nnot json\n', '.jsonl')
+
+        self.assertEqual(Post.objects.count(), 3)
+        post = Post.objects.get(text='Первый')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(
+            post.pub_date,
+            datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        )
+        self.author.profile.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(self.author.profile.posts_count, 3)
+        self.assertEqual(self.group.posts_count, 1)
+
+    def test_import_csv(self):
+        self.import_posts(
+            'text,author,group\n'
+            'Первый,author_test_name,group-test-slug\n'
+            'Второй,author_test_name,\n'
+            'Третий,author_test_name,not-existed\n',
+            '.csv',
+        )
+
+        self.assertEqual(
+            set(Post.objects.values_list('text', 'group')),
+            {('Первый', self.group.pk), ('Второй', None)},
+        )
+
+    def test_records_of_wrong_types_are_skipped(self):
+        records = (
+            {'text': 'Числовая дата', 'author': 'author_test_name',
+             'pub_date': 1577934245},
+            {'text': 'Автор-словарь', 'author': {'name': 'author'}},
+            {'text': 'Группа-список', 'author': 'author_test_name',
+             'group': ['group-test-slug']},
+            {'text': ['Текст-список'], 'author': 'author_test_name'},
+            {'text': 'Верный', 'author': 'author_test_name'},
+        )
+        content = '\n'.join(json.dumps(record) for record in records)
+        self.import_posts(content, '.jsonl')
+
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)), ['Верный']
+        )
+
+    def test_import_refreshes_cached_feeds(self):
+        paths = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group-test-slug'}),
+            reverse(
+                'posts:profile', kwargs={'username': 'author_test_name'}
+            ),
+        )
+        feeds = feed_cache()
+        feeds.clear()
+        feeds.set_many({
+            feed_count_key(path): (10, False, time.time() + 60)
+            for path in paths
+        })
+        versions = [feed_version(path) for path in paths]
+        feeds.set(syndication_key(reverse('posts:index_rss')), 'лента')
+
+        records = (
+            {'text': 'Первый', 'author': 'author_test_name',
+             'group': 'group-test-slug'},
+            {'text': 'Второй', 'author': 'author_test_name'},
+            {'text': 'Третий', 'author': 'author_test_name'},
+        )
+        content = '\n'.join(json.dumps(record) for record in records)
+        self.import_posts(content, '.jsonl')
+
+        for path, version, count in zip(paths, versions, (13, 11, 13)):
+            with self.subTest(path=path):
+                self.assertEqual(
+                    feeds.get(feed_count_key(path))[0], count
+                )
+                self.assertNotEqual(feed_version(path), version)
+        self.assertIsNone(
+            feeds.get(syndication_key(reverse('posts:index_rss')))
+        )
+
+
+class ExportPostsCommandTests(TestCase):
+    def test_export_author_posts(self):
+        author = User.objects.create_user(username='author_test_name')
+        Post.objects.create(text='Первый', author=author)
+        Post.objects.create(text='Второй', author=author)
+
+        out = StringIO()
+        call_command(
+            'export_posts', '--author', 'author_test_name', stdout=out
+        )
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(
+            [record['text'] for record in records], ['Первый', 'Второй']
+        )
+
+
+class SeedBenchCommandTests(TestCase):
+    def test_seed_bench(self):
+        call_command(
+            'seed_bench', '--users=20', '--groups=3', '--posts=150',
+            '--batch-size=40', stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 150)
+
+        for user in User.objects.select_related('profile'):
+            with self.subTest(username=user.username):
+                self.assertEqual(
+                    user.profile.posts_count, user.posts.count()
+                )
+        for group in Group.objects.all():
+            with self.subTest(slug=group.slug):
+                self.assertEqual(group.posts_count, group.posts.count())
+
+        pub_dates = list(
+            Post.objects.order_by('pk').values_list('pub_date', flat=True)
+        )
+        self.assertEqual(pub_dates, sorted(pub_dates))
+
+
+class RunBenchCommandTests(TestCase):
+    def test_run_bench_reports_every_page(self):
+        call_command(
+            'seed_bench', '--users=5', '--groups=2', '--posts=30',
+            stdout=StringIO(),
+        )
+        out = StringIO()
+        call_command(
+            'run_bench', '--requests=2', '--concurrency=1', '--warmup=0',
+            stdout=out, stderr=StringIO(),
+        )
+        report = json.loads(out.getvalue())
+        names = {result['name'] for result in report['results']}
+        for name in ('posts:index', 'posts:post_detail', 'users:login'):
+            with self.subTest(name=name):
+                self.assertIn(name, names)
+        for result in report['results']:
+            with self.subTest(url=result['url']):
+                self.assertEqual(result['requests'], 2)
+                self.assertEqual(result['errors'], 0)
+                self.assertEqual(
+                    set(result['latency_ms']), {'p50', 'p95', 'p99'}
+                )
+
+    def test_run_bench_needs_data(self):
+        with self.assertRaises(CommandError):
+            call_command('run_bench', stdout=StringIO())
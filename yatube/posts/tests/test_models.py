@@ -1,7 +1,16 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from users.models import Profile
 
-from ..models import Group, Post
+from ..models import Group, GroupActivity, Post
+from ..utils import capped_batch_size
 
 User = get_user_model()
 
@@ -72,3 +81,167 @@ class PostsModelsTest(TestCase):
             with self.subTest(key=key):
                 self.assertEqual(
                     self.group._meta.get_field(key).verbose_name, value)
+
+
+class PostsCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author_test_name')
+
+        cls.group_one = Group.objects.create(
+            title='Первая группа',
+            slug='group-one-slug',
+        )
+
+        cls.group_two = Group.objects.create(
+            title='Вторая группа',
+            slug='group-two-slug',
+        )
+
+    def assertCounters(self, author, group_one, group_two):
+        self.author.profile.refresh_from_db()
+        self.group_one.refresh_from_db()
+        self.group_two.refresh_from_db()
+        self.assertEqual(self.author.profile.posts_count, author)
+        self.assertEqual(self.group_one.posts_count, group_one)
+        self.assertEqual(self.group_two.posts_count, group_two)
+
+    def test_counters_follow_post_lifecycle(self):
+        post = Post.objects.create(
+            text='Тестовый пост',
+            author=self.author,
+            group=self.group_one,
+        )
+        self.assertCounters(1, 1, 0)
+
+        post.text = 'Измененный пост'
+        post.save()
+        self.assertCounters(1, 1, 0)
+
+        post.group = self.group_two
+        post.save()
+        self.assertCounters(1, 0, 1)
+
+        post.group = None
+        post.save()
+        self.assertCounters(1, 0, 0)
+
+        post.delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_recount_posts_repairs_counters(self):
+        Post.objects.create(
+            text='Тестовый пост',
+            author=self.author,
+            group=self.group_one,
+        )
+        Profile.objects.update(posts_count=100)
+        Group.objects.update(posts_count=100)
+
+        call_command('recount_posts', stdout=StringIO())
+
+        self.assertCounters(1, 1, 0)
+
+    def test_recount_posts_caps_batch_size(self):
+        self.assertLess(capped_batch_size(Profile, 10 ** 6), 10 ** 6)
+        self.assertEqual(capped_batch_size(Profile, 10), 10)
+
+        User.objects.bulk_create(
+            User(username=f'user_{number}') for number in range(50)
+        )
+        call_command(
+            'recount_posts', '--batch-size', str(10 ** 6), stdout=StringIO()
+        )
+        self.assertFalse(User.objects.filter(profile__isnull=True).exists())
+
+
+class GroupActivityTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author_test_name')
+
+        cls.group_one = Group.objects.create(
+            title='Первая группа',
+            slug='group-one-slug',
+        )
+
+        cls.group_two = Group.objects.create(
+            title='Вторая группа',
+            slug='group-two-slug',
+        )
+
+        cls.old_date = timezone.now() - datetime.timedelta(days=30)
+
+    def activity(self):
+        return set(GroupActivity.objects.filter(
+            posts_count__gt=0
+        ).values_list('group__slug', 'day', 'posts_count'))
+
+    def test_activity_follows_post_lifecycle(self):
+        today = timezone.localdate()
+        with mock.patch('django.utils.timezone.now', return_value=(
+            self.old_date
+        )):
+            old_post = Post.objects.create(
+                text='Старый пост',
+                author=self.author,
+                group=self.group_one,
+            )
+        post = Post.objects.create(
+            text='Тестовый пост',
+            author=self.author,
+            group=self.group_one,
+        )
+        # The bucket of the old post left the window with today's one
+        self.assertEqual(self.activity(), {
+            ('group-one-slug', today, 1),
+        })
+        self.group_one.refresh_from_db()
+        self.assertEqual(self.group_one.last_post_date, post.pub_date)
+
+        post.group = self.group_two
+        post.save()
+        self.assertEqual(self.activity(), {
+            ('group-two-slug', today, 1),
+        })
+        self.group_one.refresh_from_db()
+        self.assertEqual(self.group_one.last_post_date, old_post.pub_date)
+
+        post.delete()
+        old_post.delete()
+        self.assertEqual(self.activity(), set())
+        self.group_one.refresh_from_db()
+        self.assertIsNone(self.group_one.last_post_date)
+
+    def test_recount_posts_rebuilds_activity(self):
+        post = Post.objects.create(
+            text='Тестовый пост',
+            author=self.author,
+            group=self.group_one,
+        )
+        GroupActivity.objects.update(posts_count=100)
+        Group.objects.update(last_post_date=None)
+
+        with mock.patch('django.utils.timezone.now', return_value=(
+            self.old_date
+        )):
+            Post.objects.create(
+                text='Старый пост',
+                author=self.author,
+                group=self.group_two,
+            )
+
+        call_command('recount_posts', stdout=StringIO())
+
+        self.assertEqual(self.activity(), {
+            ('group-one-slug', timezone.localdate(), 1),
+        })
+        self.assertFalse(GroupActivity.objects.filter(
+            day=self.old_date.date()
+        ).exists())
+        self.group_one.refresh_from_db()
+        self.assertEqual(self.group_one.last_post_date, post.pub_date)
@@ -0,0 +1,97 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Post
+from ..search import SEARCH_TABLE
+
+User = get_user_model()
+
+
+class PostsSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author_test_name')
+
+        cls.post_rare = Post.objects.create(
+            text='Кошка спит на окне',
+            author=cls.author,
+        )
+
+        cls.post_frequent = Post.objects.create(
+            text='Кошка ловит кошку, кошка довольна',
+            author=cls.author,
+        )
+
+        Post.objects.create(
+            text='Собака гуляет во дворе',
+            author=cls.author,
+        )
+
+    def setUp(self):
+        self.guest = Client()
+
+    def search(self, query, **params):
+        response = self.guest.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'posts/search.html')
+        return list(response.context['page_obj'])
+
+    def test_results_are_ranked(self):
+        self.assertEqual(
+            self.search('кошка'), [self.post_frequent, self.post_rare]
+        )
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.search('кошка окне'), [self.post_rare])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"кошка OR AND*'), [])
+
+    def test_empty_query_finds_nothing(self):
+        self.assertEqual(self.search(''), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        post_rare = Post.objects.get(pk=self.post_rare.pk)
+        post_rare.text = 'Попугай спит на окне'
+        post_rare.save()
+        self.assertEqual(self.search('попугай'), [post_rare])
+        self.assertEqual(self.search('кошка'), [self.post_frequent])
+
+        Post.objects.filter(pk=self.post_frequent.pk).delete()
+        self.assertEqual(self.search('кошка'), [])
+
+    def test_results_are_paginated(self):
+        for i in range(12):
+            Post.objects.create(text=f'Тигр №{i}', author=self.author)
+
+        self.assertEqual(len(self.search('тигр')), 10)
+        self.assertEqual(len(self.search('тигр', page=2)), 2)
+
+    def test_rebuild_search_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) "
+                f"VALUES ('delete-all')"
+            )
+        self.assertEqual(self.search('кошка'), [])
+
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        self.assertEqual(
+            self.search('кошка'), [self.post_frequent, self.post_rare]
+        )
+        with connection.cursor() as cursor:
+            # Raises if the index does not match the posts it was built of
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) "
+                f"VALUES ('integrity-check', 1)"
+            )
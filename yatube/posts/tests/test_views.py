@@ -1,13 +1,49 @@
+import base64
+import csv
+import datetime
+import io
+import json
+from unittest import mock
+
 from django import forms
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
-from django.urls import reverse
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, router
+from django.http import HttpResponse
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from core.middleware.query_budget import QueryBudgetExceeded, query_budget
+from core.middleware.replicas import STICKY_COOKIE, replica_reads
+from core.routers import set_replica_reads
+from core.tasks import run_tasks
 
-from ..models import Post, Group
+from ..cache import (
+    cached_feed_count, feed_cache, feed_count_key, feed_page_stats
+)
+from ..checks import check_feed_cache
+from .. import views
+from ..models import Follow, Group, Post, TimelineEntry
+from ..signals import (
+    purge_author_feeds, purge_group_directory, purge_post_feeds,
+    shift_feed_counts
+)
+from ..templatetags.pagination import page_window
 
 User = get_user_model()
 
 
+def clear_caches():
+    cache.clear()
+    feed_cache().clear()
+
+
 class PostsViewsTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -240,3 +276,1198 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(first_object.text, 'Тестовый пост №3')
                 self.assertEqual(first_object.author, self.author)
                 self.assertEqual(first_object.group, self.group)
+
+
+class GroupIndexViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author_name')
+
+        cls.quiet_group = Group.objects.create(
+            title='Тихая группа',
+            slug='quiet-slug',
+        )
+
+        cls.busy_group = Group.objects.create(
+            title='Активная группа',
+            slug='busy-slug',
+            description='Тестовое описание',
+        )
+
+        month_ago = timezone.now() - datetime.timedelta(days=30)
+        with mock.patch('django.utils.timezone.now', return_value=month_ago):
+            Post.objects.create(
+                text='Старый пост', author=cls.author, group=cls.quiet_group
+            )
+            Post.objects.create(
+                text='Старый пост', author=cls.author, group=cls.busy_group
+            )
+        Post.objects.create(
+            text='Новый пост', author=cls.author, group=cls.busy_group
+        )
+
+    def setUp(self):
+        clear_caches()
+        self.guest_client = Client()
+
+    def test_groups_are_listed_with_activity(self):
+        response = self.guest_client.get(reverse('posts:group_index'))
+        self.assertTemplateUsed(response, 'posts/group_index.html')
+        groups = [
+            (group.slug, group.posts_count, group.recent_posts_count)
+            for group in response.context['page_obj']
+        ]
+        self.assertEqual(groups, [('busy-slug', 2, 1), ('quiet-slug', 1, 0)])
+        self.assertContains(
+            response, reverse('posts:group_list', kwargs={'slug': 'busy-slug'})
+        )
+
+    def test_groups_are_paginated(self):
+        Group.objects.bulk_create(
+            Group(title=f'Группа №{number}', slug=f'group-{number}')
+            for number in range(20)
+        )
+        response = self.guest_client.get(
+            reverse('posts:group_index') + '?page=2'
+        )
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    @override_settings(FEED_PAGE_CACHE_ENABLED=True)
+    def test_directory_is_cached_until_purged(self):
+        url = reverse('posts:group_index')
+        self.guest_client.get(url)
+        response = self.guest_client.get(url)
+        self.assertIsNone(response.context)
+
+        Group.objects.create(title='Новая группа', slug='new-slug')
+        response = self.guest_client.get(url)
+        self.assertNotContains(response, 'Новая группа')
+
+        purge_group_directory(1)
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Новая группа')
+
+    @override_settings(FEED_PAGE_CACHE_ENABLED=True)
+    def test_group_edit_purges_its_feed(self):
+        url = reverse('posts:group_list', kwargs={'slug': 'busy-slug'})
+        etag = self.guest_client.get(url)['ETag']
+
+        self.busy_group.title = 'Переименованная группа'
+        self.busy_group.save()
+        # TestCase never commits, so purge what the on_commit hook would
+        purge_group_directory(slugs=['busy-slug'])
+
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Переименованная группа')
+
+
+@override_settings(POSTS_CURSOR_PAGINATION=True)
+class CursorPaginatorViewsTest(TestCase):
+    NUM_POSTS = 13
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author_name')
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group-slug',
+            description='Тестовое описание',
+        )
+
+        for i in range(cls.NUM_POSTS):
+            Post.objects.create(
+                text=f'Тестовый пост №{i + 1}',
+                author=cls.author,
+                group=cls.group,
+            )
+
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author_name'}),
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_pages_follow_cursors(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                first_page = response.context['page_obj']
+                self.assertEqual(len(first_page), 10)
+                self.assertEqual(first_page[0].text, 'Тестовый пост №13')
+                self.assertFalse(first_page.has_previous())
+
+                response = self.guest_client.get(
+                    url, {'cursor': first_page.next_cursor}
+                )
+                second_page = response.context['page_obj']
+                self.assertEqual(len(second_page), 3)
+                self.assertEqual(second_page[0].text, 'Тестовый пост №3')
+                self.assertFalse(second_page.has_next())
+
+                response = self.guest_client.get(
+                    url, {'cursor': second_page.previous_cursor}
+                )
+                self.assertEqual(
+                    list(response.context['page_obj']), list(first_page)
+                )
+
+    def test_pages_do_not_count_rows(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.guest_client.get(url)
+                self.assertFalse(any(
+                    'COUNT(' in query['sql'] for query in queries
+                ))
+
+    def test_invalid_cursor_returns_first_page(self):
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': 'not-a-cursor'}
+        )
+        first_object = response.context['page_obj'][0]
+        self.assertEqual(first_object.text, 'Тестовый пост №13')
+
+    def test_crafted_cursors_return_first_page(self):
+        keys = (
+            [1, 2],
+            [None, None],
+            ['2020-01-01T00:00:00+00:00', {'id': 1}],
+            ['не дата', 1],
+            [True, False],
+        )
+        for key in keys:
+            with self.subTest(key=key):
+                payload = json.dumps({'k': key, 'b': 0}).encode()
+                cursor = base64.urlsafe_b64encode(payload).decode()
+                response = self.guest_client.get(
+                    reverse('posts:index'), {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 200)
+                first_object = response.context['page_obj'][0]
+                self.assertEqual(first_object.text, 'Тестовый пост №13')
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True)
+class QueryBudgetViewsTest(TestCase):
+    NUM_POSTS = 10
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group-slug',
+        )
+
+        for i in range(cls.NUM_POSTS):
+            cls.post = Post.objects.create(
+                text=f'Тестовый пост №{i + 1}',
+                author=User.objects.create_user(username=f'author_{i}'),
+                group=Group.objects.create(
+                    title=f'Группа №{i + 1}',
+                    slug=f'group-{i}',
+                ),
+            )
+        cls.post.group = cls.group
+        cls.post.save()
+
+    def setUp(self):
+        self.guest = Client()
+
+        self.logged_in_author = Client()
+        self.logged_in_author.force_login(self.post.author)
+
+    def test_feed_pages_stay_within_budget(self):
+        table = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group-slug'}),
+            reverse(
+                'posts:profile', kwargs={'username': self.post.author}
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+
+        for client in (self.guest, self.logged_in_author):
+            for url in table:
+                with self.subTest(url=url):
+                    response = client.get(url)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_view_over_budget_fails(self):
+        @query_budget(1)
+        def view(request):
+            return HttpResponse(Post.objects.count() + Group.objects.count())
+
+        urlconf = type('urls', (), {'urlpatterns': [path('', view)]})
+        with override_settings(ROOT_URLCONF=urlconf):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.guest.get('/')
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(
+            username='author_name',
+            first_name='Лев',
+            last_name='Толстой',
+        )
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group-slug',
+        )
+
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        clear_caches()
+
+        self.guest = Client()
+
+        self.logged_in_author = Client()
+        self.logged_in_author.force_login(self.author)
+
+    def test_cards_are_rendered_once(self):
+        response = self.guest.get(reverse('posts:index'))
+        self.assertTemplateUsed(response, 'posts/includes/post_card.html')
+
+        response = self.guest.get(reverse('posts:index'))
+        self.assertTemplateNotUsed(
+            response, 'posts/includes/post_card.html'
+        )
+        self.assertContains(response, self.post.text)
+
+    def test_post_edit_refreshes_card(self):
+        self.guest.get(reverse('posts:index'))
+
+        self.logged_in_author.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Измененный пост', 'group': self.group.pk},
+        )
+
+        response = self.guest.get(reverse('posts:index'))
+        self.assertContains(response, 'Измененный пост')
+
+    def test_author_rename_refreshes_card(self):
+        self.guest.get(reverse('posts:index'))
+
+        self.author.first_name = 'Алексей'
+        self.author.save()
+
+        response = self.guest.get(reverse('posts:index'))
+        self.assertContains(response, 'Алексей Толстой')
+
+    def test_author_rename_does_not_write_posts(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.guest.get(url)['ETag']
+        updated = self.post.updated
+
+        self.author.first_name = 'Алексей'
+        self.author.save()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated, updated)
+        response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Алексей Толстой')
+
+    def test_group_slug_change_refreshes_card(self):
+        self.guest.get(reverse('posts:index'))
+
+        self.group.slug = 'new-group-slug'
+        self.group.save()
+
+        response = self.guest.get(reverse('posts:index'))
+        self.assertContains(response, '/group/new-group-slug/')
+
+    def test_group_delete_refreshes_card(self):
+        self.guest.get(reverse('posts:index'))
+
+        Group.objects.filter(pk=self.group.pk).delete()
+
+        response = self.guest.get(reverse('posts:index'))
+        self.assertContains(response, self.post.text)
+        self.assertNotContains(response, '/group/group-slug/')
+
+
+class FeedCacheCheckTest(TestCase):
+    @override_settings(FEED_PAGE_CACHE_ENABLED=True)
+    def test_process_local_cache_is_refused(self):
+        errors = check_feed_cache(None)
+        self.assertEqual([error.id for error in errors], ['posts.E001'])
+
+    def test_shared_cache_is_accepted(self):
+        caches = {**settings.CACHES, 'feeds': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': '/tmp/yatube-feeds',
+        }}
+        with override_settings(FEED_PAGE_CACHE_ENABLED=True, CACHES=caches):
+            self.assertEqual(check_feed_cache(None), [])
+        with override_settings(FEED_PAGE_CACHE_ENABLED=False):
+            self.assertEqual(check_feed_cache(None), [])
+
+
+@override_settings(FEED_PAGE_CACHE_ENABLED=True)
+class FeedPageCacheTest(TransactionTestCase):
+    def setUp(self):
+        clear_caches()
+
+        self.author = User.objects.create_user(username='author_name')
+
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group-slug',
+        )
+
+        Post.objects.create(
+            text='Тестовый пост',
+            author=self.author,
+            group=self.group,
+        )
+
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author_name'}),
+        )
+
+        self.guest = Client()
+
+        self.logged_in_author = Client()
+        self.logged_in_author.force_login(self.author)
+
+    def test_anonymous_pages_are_cached(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                self.assertIsNotNone(response.context)
+
+                response = self.guest.get(url)
+                self.assertIsNone(response.context)
+                self.assertContains(response, 'Тестовый пост')
+
+        self.assertEqual(feed_page_stats(), {'hits': 3, 'misses': 3})
+
+    def test_stats_are_shared_by_workers(self):
+        self.guest.get(reverse('posts:index'))
+        self.guest.get(reverse('posts:index'))
+        # Another worker has its own default cache, but shares the feeds one
+        cache.clear()
+        out = io.StringIO()
+        call_command('feed_cache_stats', '--reset', stdout=out)
+        self.assertIn('hits: 1\nmisses: 1', out.getvalue())
+        self.assertEqual(feed_page_stats(), {'hits': 0, 'misses': 0})
+
+    def test_logged_in_pages_are_not_cached(self):
+        self.logged_in_author.get(reverse('posts:index'))
+        response = self.logged_in_author.get(reverse('posts:index'))
+        self.assertIsNotNone(response.context)
+
+    def test_post_create_purges_feed_pages(self):
+        for url in self.urls:
+            self.guest.get(url)
+
+        self.logged_in_author.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост', 'group': self.group.pk},
+        )
+
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                self.assertIsNotNone(response.context)
+                self.assertContains(response, 'Новый пост')
+
+    def test_post_edit_purges_old_group_pages(self):
+        url = reverse('posts:group_list', kwargs={'slug': 'group-slug'})
+        self.guest.get(url)
+        post = Post.objects.get()
+
+        self.logged_in_author.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={'text': post.text},
+        )
+
+        response = self.guest.get(url)
+        self.assertNotContains(response, post.text)
+
+
+class PostsExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='user_name')
+
+        cls.staff = User.objects.create_user(
+            username='staff_name', is_staff=True
+        )
+
+        cls.author = User.objects.create_user(username='author_name')
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group-slug',
+        )
+
+        cls.post = Post.objects.create(
+            text='Тестовый пост, с запятой',
+            author=cls.author,
+            group=cls.group,
+        )
+
+        Post.objects.create(text='Чужой пост', author=cls.user)
+
+    def setUp(self):
+        self.logged_in_user = Client()
+        self.logged_in_user.force_login(self.user)
+
+        self.logged_in_staff = Client()
+        self.logged_in_staff.force_login(self.staff)
+
+        self.logged_in_author = Client()
+        self.logged_in_author.force_login(self.author)
+
+    def test_author_exports_own_posts_as_jsonl(self):
+        response = self.logged_in_author.get(reverse(
+            'posts:profile_export', kwargs={'username': 'author_name'}
+        ))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record['id'], self.post.pk)
+        self.assertEqual(record['text'], self.post.text)
+        self.assertEqual(record['author'], 'author_name')
+        self.assertEqual(record['group'], 'group-slug')
+
+    def test_staff_exports_group_as_csv(self):
+        response = self.logged_in_staff.get(reverse(
+            'posts:group_export', kwargs={'slug': 'group-slug'}
+        ), {'format': 'csv'})
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], ['id', 'text', 'pub_date', 'author',
+                                   'group'])
+        self.assertEqual(rows[1][1], self.post.text)
+        self.assertEqual(len(rows), 2)
+
+    def test_export_is_restricted(self):
+        table = {
+            reverse(
+                'posts:profile_export', kwargs={'username': 'author_name'}
+            ): reverse('posts:profile', kwargs={'username': 'author_name'}),
+            reverse(
+                'posts:group_export', kwargs={'slug': 'group-slug'}
+            ): reverse('posts:group_list', kwargs={'slug': 'group-slug'}),
+        }
+        for url, redirect_url in table.items():
+            with self.subTest(url=url):
+                response = self.logged_in_user.get(url)
+                self.assertRedirects(response, redirect_url)
+                response = Client().get(url)
+                self.assertRedirects(response, reverse('users:login'))
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author_name')
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group-slug',
+        )
+
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.author,
+            group=cls.group,
+        )
+
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author_name'}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        clear_caches()
+
+        self.guest = Client()
+
+        self.logged_in_author = Client()
+        self.logged_in_author.force_login(self.author)
+
+    def test_matching_etag_is_not_modified(self):
+        for client in (self.guest, self.logged_in_author):
+            for url in self.urls:
+                with self.subTest(url=url):
+                    response = client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    response = client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                    self.assertEqual(response.status_code, 304)
+                    self.assertIsNone(response.context)
+
+    def test_anonymous_last_modified_is_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                response = self.guest.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_user(self):
+        response = self.guest.get(self.urls[0])
+        self.assertNotIn('Last-Modified', self.logged_in_author.get(
+            self.urls[0]
+        ))
+        response = self.logged_in_author.get(
+            self.urls[0], HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_edit_changes_etag(self):
+        etags = [self.guest.get(url)['ETag'] for url in self.urls]
+
+        self.logged_in_author.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Измененный пост', 'group': self.group.pk},
+        )
+        # TestCase never commits, so purge what the on_commit hook would
+        purge_post_feeds(self.author.pk, {self.group.pk})
+
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_feed_versions_are_shared_by_workers(self):
+        etag = self.guest.get(self.urls[0])['ETag']
+        # Another worker has its own default cache, but shares the feeds one
+        cache.clear()
+        response = self.guest.get(self.urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_feed_validators_do_not_scan_posts(self):
+        for url in self.urls[:3]:
+            with self.subTest(url=url):
+                etag = self.guest.get(url)['ETag']
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(any(
+                    'posts_post' in query['sql'] for query in queries
+                ))
+
+    def test_author_and_group_edits_change_etag(self):
+        edits = (
+            (self.urls[:3], 'first_name', self.author, purge_author_feeds),
+            (self.urls[1:2], 'description', self.group, lambda pk: (
+                purge_group_directory(slugs=[self.group.slug])
+            )),
+        )
+        for urls, field, instance, purge in edits:
+            with self.subTest(field=field):
+                etags = [self.guest.get(url)['ETag'] for url in urls]
+
+                setattr(instance, field, 'Новое значение')
+                instance.save()
+                # TestCase never commits, so purge what the on_commit
+                # hook would
+                purge(instance.pk)
+
+                for url, etag in zip(urls, etags):
+                    response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_group_title_edit_changes_post_etag(self):
+        url = self.urls[3]
+        etag = self.guest.get(url)['ETag']
+
+        self.group.title = 'Новое название'
+        self.group.save()
+
+        response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новое название')
+
+
+@override_settings(SYNDICATION_CACHE_ENABLED=True)
+class SyndicationFeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author_name')
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group-slug',
+        )
+
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.author,
+            group=cls.group,
+        )
+
+        cls.urls = (
+            reverse('posts:index_rss'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_rss', kwargs={'slug': 'group-slug'}),
+            reverse('posts:group_atom', kwargs={'slug': 'group-slug'}),
+            reverse('posts:profile_rss', kwargs={'username': 'author_name'}),
+            reverse('posts:profile_atom', kwargs={'username': 'author_name'}),
+        )
+
+    def setUp(self):
+        clear_caches()
+
+        self.guest = Client()
+
+        self.logged_in_author = Client()
+        self.logged_in_author.force_login(self.author)
+
+    def test_feeds_show_posts(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Тестовый пост')
+                self.assertIn('ETag', response)
+                self.assertIn('Last-Modified', response)
+
+    def test_missing_feed_object(self):
+        urls = (
+            reverse('posts:group_rss', kwargs={'slug': 'missing'}),
+            reverse('posts:profile_atom', kwargs={'username': 'missing'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.guest.get(url).status_code, 404)
+
+    def test_feeds_are_cached(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                content = self.guest.get(url).content
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.guest.get(url)
+                self.assertEqual(len(queries), 0)
+                self.assertEqual(response.content, content)
+
+    @override_settings(SYNDICATION_CACHE_ENABLED=False)
+    def test_feeds_are_not_cached_when_disabled(self):
+        self.guest.get(self.urls[0])
+        with CaptureQueriesContext(connection) as queries:
+            self.guest.get(self.urls[0])
+        self.assertGreater(len(queries), 0)
+
+    def test_matching_etag_is_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                response = self.guest.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_feeds_are_gzipped(self):
+        response = self.guest.get(
+            self.urls[0], HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_post_edit_purges_feeds(self):
+        for url in self.urls:
+            self.guest.get(url)
+
+        self.logged_in_author.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Измененный пост', 'group': self.group.pk},
+        )
+        # TestCase never commits, so purge what the on_commit hook would
+        purge_post_feeds(self.author.pk, {self.group.pk})
+
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest.get(url), 'Измененный пост')
+
+    def test_author_rename_purges_feeds(self):
+        for url in self.urls:
+            self.guest.get(url)
+
+        self.author.first_name = 'Лев'
+        self.author.last_name = 'Толстой'
+        self.author.save()
+        # TestCase never commits, so purge what the on_commit hook would
+        purge_author_feeds(self.author.pk)
+
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest.get(url), 'Лев Толстой')
+
+    def test_group_edit_purges_feeds(self):
+        urls = self.urls[2:4]
+        for url in urls:
+            self.guest.get(url)
+
+        self.group.title = 'Новое название'
+        self.group.save()
+        purge_group_directory(slugs=[self.group.slug])
+
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest.get(url), 'Новое название')
+
+
+class PageLinksTest(TestCase):
+    NUM_PAGES = 30
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        author = User.objects.create_user(username='author_name')
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый пост №{i + 1}', author=author)
+            for i in range(cls.NUM_PAGES * 10)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_page_window(self):
+        table = (
+            (1, 1, [1]),
+            (1, 5, [1, 2, 3, 4, 5]),
+            (1, 30, [1, 2, 3, None, 30]),
+            (5, 30, [1, 2, 3, 4, 5, 6, 7, None, 30]),
+            (15, 30, [1, None, 13, 14, 15, 16, 17, None, 30]),
+            (30, 30, [1, None, 28, 29, 30]),
+            (500000, 10 ** 6, [
+                1, None, 499998, 499999, 500000, 500001, 500002, None,
+                10 ** 6,
+            ]),
+        )
+        for number, num_pages, expected in table:
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(page_window(number, num_pages), expected)
+
+    def test_feed_links_only_window(self):
+        response = self.guest_client.get(reverse('posts:index'), {
+            'page': 15,
+        })
+        for page in (1, 13, 14, 16, 17, 30):
+            with self.subTest(page=page):
+                self.assertContains(response, f'page={page}"')
+        for page in (2, 12, 18, 29):
+            with self.subTest(page=page):
+                self.assertNotContains(response, f'page={page}"')
+        self.assertContains(response, '…', count=2)
+
+
+@override_settings(FEED_COUNT_CACHE_ENABLED=True)
+class FeedCountCacheTest(TestCase):
+    NUM_POSTS = 13
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author_name')
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group-slug',
+        )
+
+        for i in range(cls.NUM_POSTS):
+            Post.objects.create(
+                text=f'Тестовый пост №{i + 1}',
+                author=cls.author,
+                group=cls.group,
+            )
+
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author_name'}),
+        )
+
+    def setUp(self):
+        clear_caches()
+
+        self.guest_client = Client()
+
+    def test_count_is_cached(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.guest_client.get(url, {'page': 2})
+                self.assertFalse([
+                    query for query in queries
+                    if 'COUNT(' in query['sql']
+                ])
+                self.assertEqual(response.context['page_obj'].number, 2)
+                self.assertEqual(
+                    response.context['page_obj'].paginator.count,
+                    self.NUM_POSTS,
+                )
+
+    @override_settings(FEED_EXACT_COUNT_LIMIT=5)
+    def test_long_feeds_are_estimated(self):
+        Group.objects.filter(pk=self.group.pk).update(posts_count=25)
+
+        response = self.guest_client.get(self.urls[1])
+        paginator = response.context['page_obj'].paginator
+        self.assertTrue(paginator.approximate)
+        self.assertEqual(paginator.count, 25)
+        self.assertContains(response, 'Примерно 3 стр.')
+
+        response = self.guest_client.get(self.urls[0])
+        self.assertEqual(
+            response.context['page_obj'].paginator.count, self.NUM_POSTS
+        )
+
+    def test_stale_count_is_served_during_refresh(self):
+        key = feed_count_key('/feed/')
+        feed_cache().set(key, (10, False, 0))
+        feed_cache().set(f'{key}:refresh', True)
+
+        def recount():
+            raise AssertionError('Размер ленты пересчитан дважды')
+
+        self.assertEqual(cached_feed_count('/feed/', recount), (10, False))
+
+        feed_cache().delete(f'{key}:refresh')
+        self.assertEqual(
+            cached_feed_count('/feed/', lambda: (11, False)), (11, False)
+        )
+        self.assertEqual(cached_feed_count('/feed/', recount), (11, False))
+
+    def test_new_post_shifts_cached_counts(self):
+        for url in self.urls:
+            self.guest_client.get(url)
+
+        Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group
+        )
+        # TestCase never commits, so shift what the on_commit hook would
+        shift_feed_counts(1, self.author.pk, [self.group.pk])
+
+        for url in self.urls:
+            with self.subTest(url=url):
+                count, approximate, fresh_until = feed_cache().get(
+                    feed_count_key(url)
+                )
+                self.assertEqual(count, self.NUM_POSTS + 1)
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaReadsTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        # A replica alias mirroring the test database, configured the
+        # way the test runner configures a TEST MIRROR
+        connections.databases['replica'] = {
+            **settings.DATABASES['default'],
+            'TEST': {'MIRROR': 'default'},
+        }
+        connections['replica'].creation.set_as_test_mirror(
+            connections['default'].settings_dict
+        )
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+
+    def setUp(self):
+        self.guest_client = Client()
+
+        @replica_reads
+        def read(request):
+            return HttpResponse(Group.objects.count())
+
+        @replica_reads
+        def write(request):
+            Group.objects.create(title='Тестовая группа', slug='group-slug')
+            return HttpResponse(Group.objects.count())
+
+        self.urlconf = type('urls', (), {'urlpatterns': [
+            path('read/', read),
+            path('write/', write),
+            # Writes commit at once here, and their hooks reverse URLs
+            path('', include(settings.ROOT_URLCONF)),
+        ]})
+
+    def get(self, url, method='get'):
+        """Request ``url`` and return the queries each database ran."""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.guest_client, method)(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(primary), len(replica)
+
+    def test_feed_views_read_from_replica(self):
+        for view in (views.index, views.group_list, views.profile,
+                     views.post_detail):
+            with self.subTest(view=view.__name__):
+                self.assertTrue(view.replica_reads)
+        for view in (views.post_create, views.post_edit):
+            with self.subTest(view=view.__name__):
+                self.assertFalse(hasattr(view, 'replica_reads'))
+
+    def test_reads_go_to_replica(self):
+        Group.objects.create(title='Тестовая группа', slug='group-slug')
+        with override_settings(ROOT_URLCONF=self.urlconf):
+            response, primary, replica = self.get('/read/')
+            self.assertEqual(response.content, b'1')
+            self.assertEqual((primary, replica), (0, 1))
+            self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+            response, primary, replica = self.get('/read/', 'post')
+            self.assertEqual((primary, replica), (1, 0))
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_reads_stick_to_primary_after_write(self):
+        with override_settings(ROOT_URLCONF=self.urlconf):
+            response, primary, replica = self.get('/write/')
+            self.assertEqual(response.content, b'1')
+            self.assertEqual(replica, 0)
+            self.assertEqual(
+                response.cookies[STICKY_COOKIE]['max-age'], 5
+            )
+
+            response, primary, replica = self.get('/read/')
+            self.assertEqual((primary, replica), (1, 0))
+
+            self.guest_client.cookies.pop(STICKY_COOKIE)
+            response, primary, replica = self.get('/read/')
+            self.assertEqual((primary, replica), (0, 1))
+
+    @override_settings(QUERY_BUDGET_ENABLED=True)
+    def test_replica_queries_count_against_budget(self):
+        @query_budget(1)
+        @replica_reads
+        def view(request):
+            return HttpResponse(Post.objects.count() + Group.objects.count())
+
+        urlconf = type('urls', (), {'urlpatterns': [path('', view)]})
+        with override_settings(ROOT_URLCONF=urlconf):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.guest_client.get('/')
+
+    @override_settings(REPLICA_DATABASES=['replica', 'other_replica'])
+    def test_request_reads_from_one_replica(self):
+        for attempt in range(10):
+            set_replica_reads(True)
+            picked = {router.db_for_read(Post) for read in range(10)}
+            self.assertEqual(len(picked), 1)
+        set_replica_reads(False)
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+
+class FollowTimelineTest(TestCase):
+    def setUp(self):
+        clear_caches()
+
+        self.user = User.objects.create_user(username='user_name')
+
+        self.author = User.objects.create_user(username='author_name')
+
+        self.other = User.objects.create_user(username='other_name')
+
+        self.author_post = Post.objects.create(
+            text='Пост автора', author=self.author
+        )
+
+        Post.objects.create(text='Пост другого автора', author=self.other)
+
+        self.guest = Client()
+
+        self.logged_in_user = Client()
+        self.logged_in_user.force_login(self.user)
+
+    def follow(self, author):
+        response = self.logged_in_user.post(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}
+        ))
+        run_tasks()
+        return response
+
+    def feed(self, cursor=None):
+        data = {'cursor': cursor} if cursor else {}
+        return self.logged_in_user.get(reverse('posts:follow_index'), data)
+
+    def test_follow_backfills_timeline(self):
+        response = self.follow(self.author)
+        self.assertRedirects(response, reverse(
+            'posts:profile', kwargs={'username': 'author_name'}
+        ))
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=self.author).exists()
+        )
+        self.assertEqual(
+            User.objects.get(pk=self.author.pk).profile.followers_count, 1
+        )
+
+        response = self.feed()
+        self.assertEqual(
+            list(response.context['page_obj']), [self.author_post]
+        )
+
+    def test_new_post_fans_out_to_followers(self):
+        self.follow(self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        Post.objects.create(text='Ещё пост', author=self.other)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+
+        run_tasks()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=post
+        ).exists())
+        self.assertEqual(
+            list(self.feed().context['page_obj']), [post, self.author_post]
+        )
+
+    def test_unfollow_clears_timeline(self):
+        self.follow(self.author)
+        self.logged_in_user.post(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author_name'}
+        ))
+        run_tasks()
+
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(
+            User.objects.get(pk=self.author.pk).profile.followers_count, 0
+        )
+        self.assertEqual(len(self.feed().context['page_obj']), 0)
+
+    def test_cannot_follow_self(self):
+        self.follow(self.user)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_guest_is_redirected_to_login(self):
+        response = self.guest.get(reverse('posts:follow_index'))
+        self.assertRedirects(response, reverse('users:login'))
+
+        response = self.guest.post(reverse(
+            'posts:profile_follow', kwargs={'username': 'author_name'}
+        ))
+        self.assertRedirects(response, reverse('users:login'))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_follow_requires_post(self):
+        for name in ('posts:profile_follow', 'posts:profile_unfollow'):
+            with self.subTest(name=name):
+                response = self.logged_in_user.get(
+                    reverse(name, kwargs={'username': 'author_name'})
+                )
+                self.assertEqual(response.status_code, 405)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_follow_is_csrf_protected(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(reverse(
+            'posts:profile_follow', kwargs={'username': 'author_name'}
+        ))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Follow.objects.exists())
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=0)
+    def test_popular_authors_are_pulled(self):
+        self.follow(self.other)
+        self.follow(self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        for number in range(12):
+            Post.objects.create(text=f'Пост №{number}', author=self.author)
+        run_tasks()
+        expected = list(Post.objects.filter(
+            author__in=(self.author, self.other)
+        ).order_by('-pub_date', '-pk'))
+
+        page_obj = self.feed().context['page_obj']
+        posts = list(page_obj)
+        self.assertTrue(page_obj.has_next())
+        posts += self.feed(page_obj.next_cursor).context['page_obj']
+        self.assertEqual(posts, expected)
+
+    def test_mixed_timeline_has_no_duplicates(self):
+        self.follow(self.author)
+        with override_settings(FOLLOW_FANOUT_LIMIT=0):
+            self.follow(self.other)
+            posts = list(self.feed().context['page_obj'])
+        self.assertEqual(len(posts), len(set(posts)))
+        self.assertEqual(len(posts), 2)
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=1)
+    def test_timelines_migrate_when_author_crosses_limit(self):
+        self.follow(self.author)
+        self.assertEqual(TimelineEntry.objects.count(), 1)
+
+        other_client = Client()
+        other_client.force_login(self.other)
+        url = reverse(
+            'posts:profile_follow', kwargs={'username': 'author_name'}
+        )
+        other_client.post(url)
+        run_tasks()
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(
+            list(self.feed().context['page_obj']), [self.author_post]
+        )
+
+        other_client.post(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author_name'}
+        ))
+        run_tasks()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=self.author_post
+        ).exists())
+        self.assertEqual(
+            list(self.feed().context['page_obj']), [self.author_post]
+        )
+
+    def test_profile_shows_follow_state(self):
+        url = reverse('posts:profile', kwargs={'username': 'author_name'})
+        response = self.logged_in_user.get(url)
+        self.assertFalse(response.context['following'])
+        etag = response['ETag']
+
+        self.follow(self.author)
+        response = self.logged_in_user.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['following'])
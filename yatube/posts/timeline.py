@@ -0,0 +1,159 @@
+import itertools
+
+from django.conf import settings
+
+from core.tasks import task
+from users.models import Profile
+
+from .models import Follow, Post, TimelineEntry
+from .paginators import CursorPaginator
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def is_pulled(author_id):
+    """Tell whether the posts of an author are read on demand.
+
+    Authors with more than ``FOLLOW_FANOUT_LIMIT`` followers would cost
+    too many timeline writes per post, so their posts are merged into
+    the follow feed when it is read instead.
+    """
+    return Profile.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.FOLLOW_FANOUT_LIMIT,
+    ).exists()
+
+
+def add_to_timelines(user_ids, posts):
+    """Insert ``(post_id, pub_date)`` pairs into the users' timelines."""
+    entries = (
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for user_id in user_ids
+        for post_id, pub_date in posts
+    )
+    for batch in batched(entries, settings.FOLLOW_FANOUT_BATCH_SIZE):
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+@task
+def fan_out_post(post_id):
+    """Copy a new post into the timelines of the author's followers."""
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'pub_date'
+    ).first()
+    if post is None:
+        return
+    author_id, pub_date = post
+    if is_pulled(author_id):
+        return
+    followers = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True
+    ).iterator()
+    for batch in batched(followers, settings.FOLLOW_FANOUT_BATCH_SIZE):
+        add_to_timelines(batch, [(post_id, pub_date)])
+
+
+@task
+def backfill_timeline(user_id, author_id):
+    """Copy the latest posts of a newly followed author."""
+    if is_pulled(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )[:settings.FOLLOW_BACKFILL_POSTS]
+    add_to_timelines([user_id], posts)
+
+
+@task
+def switch_fan_out_mode(author_id):
+    """Migrate the timelines of an author's followers to the author's
+    current mode.
+
+    Entries of a pulled author are dropped, the pull merge reads the
+    posts instead. A pushed author has the latest posts copied into
+    every follower's timeline.
+    """
+    if is_pulled(author_id):
+        TimelineEntry.objects.filter(post__author_id=author_id).delete()
+        return
+    posts = list(Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )[:settings.FOLLOW_BACKFILL_POSTS])
+    followers = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True
+    ).iterator()
+    for batch in batched(followers, settings.FOLLOW_FANOUT_BATCH_SIZE):
+        add_to_timelines(batch, posts)
+
+
+@task
+def clear_timeline(user_id, author_id):
+    """Remove the posts of an unfollowed author from a timeline."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+class TimelinePaginator(CursorPaginator):
+    """Cursor pagination over the follow feed of ``user``.
+
+    Pages are read from the materialized timeline and merged with the
+    posts of followed authors in pull mode. Both sources are keyed by
+    ``(pub_date, post id)``, so a cursor works for the merged feed.
+    """
+
+    ordering = ('-pub_date', '-post_id')
+    post_ordering = ('-pub_date', '-id')
+
+    def __init__(self, user, per_page):
+        super().__init__(
+            TimelineEntry.objects.filter(user=user).select_related(
+                'post__author', 'post__group'
+            ),
+            per_page,
+        )
+        self.user = user
+        self.pulled_author_ids = list(
+            Follow.objects.filter(
+                user=user,
+                author__profile__followers_count__gt=(
+                    settings.FOLLOW_FANOUT_LIMIT
+                ),
+            ).values_list('author_id', flat=True)
+        )
+
+    def _page_items(self, rows):
+        return [entry.post for entry in rows]
+
+    def _fetch(self, position, backwards):
+        rows, has_more = super()._fetch(position, backwards)
+        if not self.pulled_author_ids:
+            return rows, has_more
+
+        pulled, pulled_more = self._fetch_from(
+            Post.objects.feed().filter(author_id__in=self.pulled_author_ids),
+            self.post_ordering, position, backwards,
+        )
+        # Timelines may still hold entries of an author that has just
+        # moved to the pulled mode, so both sources are keyed by post id
+        merged = {entry.post_id: entry for entry in rows}
+        for post in pulled:
+            merged.setdefault(post.pk, TimelineEntry(
+                user=self.user, post=post, pub_date=post.pub_date
+            ))
+        merged = sorted(
+            merged.values(),
+            key=lambda entry: (entry.pub_date, entry.post_id),
+            reverse=True,
+        )
+        has_more = has_more or pulled_more or len(merged) > self.per_page
+        if backwards:
+            return merged[-self.per_page:], has_more
+        return merged[:self.per_page], has_more
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from users.models import Profile
+
+from .models import Post
+from .paginators import CachedCountPaginator, CursorPaginator
+
+POSTS_PER_PAGE = 10
+GROUPS_PER_PAGE = 20
+
+
+def paginate(request, posts, estimate=None):
+    """Return the requested page of a feed.
+
+    Cursor pagination is used when enabled by ``POSTS_CURSOR_PAGINATION``
+    or when the request already carries a ``?cursor=`` token; otherwise
+    the feed is paginated by page number, with its size cached and
+    estimated by ``estimate()`` for long feeds.
+    """
+    cursor = request.GET.get('cursor')
+    if cursor is not None or settings.POSTS_CURSOR_PAGINATION:
+        return CursorPaginator(posts, POSTS_PER_PAGE).get_page(cursor)
+    paginator = CachedCountPaginator(
+        posts, POSTS_PER_PAGE, request.path, estimate
+    )
+    return paginator.get_page(request.GET.get('page'))
+
+
+def capped_batch_size(model, batch_size):
+    """Cap ``batch_size`` to the rows of ``model`` one INSERT can hold.
+
+    SQLite limits the number of query parameters, so a large
+    ``--batch-size`` would otherwise fail with "too many SQL variables".
+    """
+    fields = model._meta.concrete_fields
+    ops = connections[router.db_for_write(model)].ops
+    return max(min(batch_size, ops.bulk_batch_size(fields, [])), 1)
+
+
+def total_posts_estimate():
+    """Sum the stored post counters of all authors."""
+    return Profile.objects.aggregate(
+        total=Sum('posts_count')
+    )['total'] or 0
+
+
+def insert_posts(posts, batch_size=None):
+    """Insert ``posts`` keeping the ``pub_date`` they are given.
+
+    Works like ``bulk_create``, but inserts the field values as they
+    are, so that ``auto_now_add`` does not stamp every imported post
+    with the time of the import. Posts without dates get the current
+    time. No signals are sent.
+    """
+    now = timezone.now()
+    for post in posts:
+        post.pub_date = post.pub_date or now
+        post.updated = post.updated or now
+    fields = [
+        field for field in Post._meta.concrete_fields
+        if not field.primary_key
+    ]
+    using = router.db_for_write(Post)
+    batch_size = capped_batch_size(Post, batch_size or len(posts) or 1)
+    with transaction.atomic(using=using, savepoint=False):
+        for start in range(0, len(posts), batch_size):
+            Post.objects.db_manager(using)._insert(
+                posts[start:start + batch_size],
+                fields=fields,
+                using=using,
+                raw=True,
+            )
@@ -1,30 +1,73 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
+from django.views.decorators.http import require_POST
+
+from core.middleware.query_budget import query_budget
+from core.middleware.replicas import replica_reads
+from users.models import Profile
 
+from .activity import group_directory
+from .cache import (
+    anonymous_page_cache, conditional_feed, conditional_view, feed_validator
+)
+from .export import EXPORT_FORMATS
 from .forms import PostForm
-from .models import Group, Post
+from .models import Follow, Group, Post
+from .paginators import CachedCountPaginator
+from .search import search_posts
+from .timeline import TimelinePaginator
+from .utils import (
+    GROUPS_PER_PAGE, POSTS_PER_PAGE, paginate, total_posts_estimate
+)
 
 User = get_user_model()
 
 
+def post_validator(request, post_id):
+    return (
+        Post.objects.filter(pk=post_id)
+        .values_list(
+            'updated',
+            'author__profile__posts_count',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+            'group__slug',
+            'group__title',
+        )
+        .first()
+    )
+
+
+@query_budget(6)
+@replica_reads
+@conditional_feed(lambda: ())
+@anonymous_page_cache
 def index(request):
-    posts = Post.objects.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = Post.objects.feed()
+    page_obj = paginate(request, posts, estimate=total_posts_estimate)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@query_budget(6)
+@replica_reads
+@conditional_feed(lambda slug: (
+    Group.objects.filter(slug=slug).values_list('posts_count').first()
+))
+@anonymous_page_cache
 def group_list(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = group.posts.feed()
+    page_obj = paginate(request, posts, estimate=lambda: group.posts_count)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -32,27 +75,176 @@ def group_list(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@query_budget(4)
+@replica_reads
+@anonymous_page_cache
+def group_index(request):
+    paginator = CachedCountPaginator(
+        group_directory(), GROUPS_PER_PAGE, request.path
+    )
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'page_obj': page_obj,
+        'activity_days': settings.GROUP_ACTIVITY_DAYS,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+def following_author(request, username):
+    """Tell whether the current user follows ``username``, once per
+    request."""
+    if not hasattr(request, 'following_author'):
+        request.following_author = (
+            request.user.is_authenticated
+            and Follow.objects.filter(
+                user=request.user, author__username=username
+            ).exists()
+        )
+    return request.following_author
+
+
+def profile_validator(request, username):
+    validator = feed_validator(request, (
+        Profile.objects.filter(user__username=username)
+        .values_list('posts_count')
+        .first()
+    ))
+    if validator is None:
+        return None
+    return (*validator, following_author(request, username))
+
+
+@query_budget(7)
+@replica_reads
+@conditional_view(profile_validator)
+@anonymous_page_cache
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username
+    )
+    posts = author.posts.feed()
+    page_obj = paginate(
+        request, posts, estimate=lambda: author.profile.posts_count
+    )
     context = {
         'author': author,
         'page_obj': page_obj,
+        'following': following_author(request, username),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@query_budget(5)
+def follow_index(request):
+    current_user = request.user
+
+    if not current_user.is_authenticated:
+        return redirect('users:login')
+
+    paginator = TimelinePaginator(current_user, POSTS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@require_POST
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    current_user = request.user
+
+    if not current_user.is_authenticated:
+        return redirect('users:login')
+
+    if current_user != author:
+        with transaction.atomic():
+            Follow.objects.get_or_create(user=current_user, author=author)
+
+    return redirect('posts:profile', username=author.username)
+
+
+@require_POST
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    current_user = request.user
+
+    if not current_user.is_authenticated:
+        return redirect('users:login')
+
+    with transaction.atomic():
+        Follow.objects.filter(user=current_user, author=author).delete()
+
+    return redirect('posts:profile', username=author.username)
+
+
+def export_response(posts, export_format, filename):
+    if export_format not in EXPORT_FORMATS:
+        export_format = 'jsonl'
+    export, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(export(posts), content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{export_format}"'
+    )
+    return response
+
+
+def group_export(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    current_user = request.user
+
+    if not current_user.is_authenticated:
+        return redirect('users:login')
+
+    if not current_user.is_staff:
+        return redirect('posts:group_list', slug=group.slug)
+
+    return export_response(
+        group.posts.all(), request.GET.get('format'), f'group-{group.slug}'
+    )
+
+
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    current_user = request.user
+
+    if not current_user.is_authenticated:
+        return redirect('users:login')
+
+    if current_user != author and not current_user.is_staff:
+        return redirect('posts:profile', username=author.username)
+
+    return export_response(
+        author.posts.all(), request.GET.get('format'), f'posts-{username}'
+    )
+
+
+@query_budget(4)
+@replica_reads
+@conditional_view(post_validator)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.feed().select_related('author__profile'), id=post_id
+    )
     context = {
         'post': post,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@query_budget(5)
+def search(request):
+    query = request.GET.get('q', '')
+    paginator = Paginator(search_posts(query), POSTS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'query_string': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 def post_create(request):
     current_user = request.user
 
@@ -65,7 +257,8 @@ def post_create(request):
         if form.is_valid():
             post = form.save(commit=False)
             post.author = current_user
-            post.save()
+            with transaction.atomic():
+                post.save()
 
             return redirect('posts:profile', username=current_user.username)
 
@@ -97,7 +290,8 @@ def post_edit(request, post_id):
         if form.is_valid():
             post = form.save(commit=False)
             post.author = current_user
-            post.save()
+            with transaction.atomic():
+                post.save()
 
             return redirect('posts:post_detail', post_id=post.id)
 
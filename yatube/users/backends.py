@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+def user_cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def forget_user(user_id):
+    user_cache().delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` keeping the users of sessions in the cache.
+
+    ``AuthenticationMiddleware`` resolves ``request.user`` through
+    ``get_user`` on every request. Cached users expire after
+    ``USER_CACHE_TIMEOUT`` and are forgotten whenever their row is saved
+    or deleted, which covers renames, password changes and deactivation.
+    The ``USER_CACHE_ALIAS`` cache must be shared by all workers, or the
+    others would keep a stale user; the ``users.E001`` check enforces it.
+    """
+
+    def get_user(self, user_id):
+        if not settings.USER_CACHE_ENABLED:
+            return super().get_user(user_id)
+
+        cache = user_cache()
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
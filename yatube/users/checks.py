@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Cache backends whose entries are private to one worker process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_user_cache(app_configs, **kwargs):
+    """Refuse a per-process user cache: a worker would keep serving a
+    user that another worker deactivated or changed the password of."""
+    if not settings.USER_CACHE_ENABLED:
+        return []
+    backend = settings.CACHES[settings.USER_CACHE_ALIAS]['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f'USER_CACHE_ENABLED needs a cache shared by all workers, but '
+        f'the {settings.USER_CACHE_ALIAS!r} cache uses {backend}.',
+        hint='Set YATUBE_USER_CACHE_DIR or configure a shared cache.',
+        id='users.E001',
+    )]
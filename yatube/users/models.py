@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import Model
+
+User = get_user_model()
+
+
+class Profile(Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile',
+        verbose_name='Пользователь',
+    )
+
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False,
+    )
+
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False,
+    )
+
+    def __str__(self) -> str:
+        return f'{self.user}'
@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.checks import Error
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..checks import check_user_cache
+
+User = get_user_model()
+
+
+@override_settings(USER_CACHE_ENABLED=True)
+class CachedModelBackendTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(
+            username='user_name', password='old-password-1'
+        )
+
+    def setUp(self):
+        caches['users'].clear()
+
+        self.logged_in_user = Client()
+        self.logged_in_user.force_login(self.user)
+
+    def tearDown(self):
+        caches['users'].clear()
+
+    def current_user(self, client):
+        return client.get(reverse('about:author')).context['user']
+
+    def test_user_is_loaded_once(self):
+        self.current_user(self.logged_in_user)
+        with CaptureQueriesContext(connection) as queries:
+            user = self.current_user(self.logged_in_user)
+        self.assertEqual(user, self.user)
+        self.assertFalse([
+            query for query in queries if 'auth_user' in query['sql']
+        ])
+
+    def test_rename_is_seen(self):
+        self.current_user(self.logged_in_user)
+
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Новое имя'
+        user.save()
+
+        self.assertEqual(
+            self.current_user(self.logged_in_user).first_name, 'Новое имя'
+        )
+
+    def test_password_change_logs_out_other_sessions(self):
+        other_session = Client()
+        other_session.force_login(self.user)
+        self.current_user(other_session)
+
+        self.logged_in_user.post(reverse('users:password_change'), {
+            'old_password': 'old-password-1',
+            'new_password1': 'new-password-2',
+            'new_password2': 'new-password-2',
+        })
+
+        self.assertEqual(self.current_user(self.logged_in_user), self.user)
+        self.assertFalse(self.current_user(other_session).is_authenticated)
+
+    def test_deactivated_user_is_logged_out(self):
+        self.current_user(self.logged_in_user)
+
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+
+        self.assertFalse(
+            self.current_user(self.logged_in_user).is_authenticated
+        )
+
+
+class UserCacheCheckTests(TestCase):
+    @override_settings(USER_CACHE_ENABLED=True)
+    def test_process_local_cache_is_refused(self):
+        errors = check_user_cache(None)
+        self.assertEqual([error.id for error in errors], ['users.E001'])
+        self.assertIsInstance(errors[0], Error)
+
+    def test_shared_cache_is_accepted(self):
+        caches = {'users': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': '/tmp/yatube-users',
+        }}
+        with override_settings(USER_CACHE_ENABLED=True, CACHES=caches):
+            self.assertEqual(check_user_cache(None), [])
+        with override_settings(USER_CACHE_ENABLED=False):
+            self.assertEqual(check_user_cache(None), [])
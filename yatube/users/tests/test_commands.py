@@ -0,0 +1,34 @@
+import datetime
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+
+class PruneSessionsCommandTests(TestCase):
+    def test_only_expired_sessions_are_deleted(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(
+                session_key=f'expired{number}',
+                session_data='',
+                expire_date=now - datetime.timedelta(days=1),
+            )
+            for number in range(7)
+        )
+        Session.objects.create(
+            session_key='active',
+            session_data='',
+            expire_date=now + datetime.timedelta(days=1),
+        )
+
+        out = StringIO()
+        call_command('prune_sessions', '--batch-size=3', stdout=out)
+
+        self.assertIn('Deleted 7 expired sessions', out.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['active'],
+        )
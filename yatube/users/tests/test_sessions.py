@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class SessionProfileTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='user_name')
+
+    def test_session_profiles_skip_session_table(self):
+        for profile in ('cached_db', 'cache', 'signed_cookies'):
+            engine = settings.SESSION_PROFILES[profile]
+            with self.subTest(profile=profile):
+                with override_settings(SESSION_ENGINE=engine):
+                    logged_in_user = Client()
+                    logged_in_user.force_login(self.user)
+                    with CaptureQueriesContext(connection) as queries:
+                        response = logged_in_user.get(reverse('posts:index'))
+                self.assertEqual(response.context['user'], self.user)
+                self.assertFalse([
+                    query for query in queries
+                    if 'django_session' in query['sql']
+                ])
@@ -1,4 +1,6 @@
 from django.contrib.auth import views as auth_views
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
 
@@ -10,6 +12,23 @@ class MyUserCreationView(CreateView):
     template_name = 'users/signup.html'
     success_url = reverse_lazy('posts:index')
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        user = self.object
+        if user.email:
+            context = {
+                'user': user,
+                'domain': self.request.get_host(),
+                'protocol': self.request.scheme,
+            }
+            send_mail(
+                'Добро пожаловать в Yatube',
+                render_to_string('users/welcome_email.txt', context),
+                None,
+                [user.email],
+            )
+        return response
+
 
 class MyLoginView(auth_views.LoginView):
     template_name = 'users/login.html'
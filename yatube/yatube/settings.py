@@ -26,6 +26,7 @@ ALLOWED_HOSTS = [
 
 INSTALLED_APPS = [
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'core.apps.CoreConfig',
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
@@ -41,20 +42,89 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-# EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Paginate feeds with ?cursor= tokens instead of ?page= numbers
+POSTS_CURSOR_PAGINATION = False
+
+# How long rendered post cards are kept in the cache, in seconds
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Cache the first pages of the feeds for anonymous users
+FEED_PAGE_CACHE_ENABLED = not DEBUG
+FEED_PAGE_CACHE_PAGES = 3
+FEED_PAGE_CACHE_TIMEOUT = 60 * 15
+
+# How long feed versions, the base of their ETags, are kept; writes to
+# the posts, authors and groups of a feed bump its version early
+FEED_VALIDATOR_TIMEOUT = 60 * 15
+
+# Feed sizes are cached and recounted at most once per FEED_COUNT_TIMEOUT
+FEED_COUNT_CACHE_ENABLED = not DEBUG
+FEED_COUNT_TIMEOUT = 60
+# Feeds longer than this are sized from the stored post counters
+FEED_EXACT_COUNT_LIMIT = 10000
+
+# Authors with more followers than this are not fanned out to timelines,
+# their posts are merged into the follow feed when it is read
+FOLLOW_FANOUT_LIMIT = 10000
+FOLLOW_FANOUT_BATCH_SIZE = 1000
+# Number of recent posts of an author copied into a timeline on follow
+FOLLOW_BACKFILL_POSTS = 100
+
+# The group directory shows the posts of this many last days
+GROUP_ACTIVITY_DAYS = 7
+
+# How long rendered RSS/Atom feeds are cached; post writes purge them early
+SYNDICATION_CACHE_ENABLED = not DEBUG
+SYNDICATION_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Emails are queued and sent by the run_tasks worker through
+# QUEUED_EMAIL_BACKEND, so no request waits for the mail server
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+# QUEUED_EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+QUEUED_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Tasks claimed by a worker at once; a claimed task is run again if its
+# worker does not finish it in TASK_LEASE_SECONDS
+TASK_BATCH_SIZE = 100
+TASK_LEASE_SECONDS = 60 * 5
+# A failed task is retried after TASK_RETRY_DELAY seconds, doubled on
+# every attempt, and given up after TASK_MAX_ATTEMPTS
+TASK_RETRY_DELAY = 30
+TASK_MAX_ATTEMPTS = 5
+# How long an idle worker sleeps before polling the queue again
+TASK_POLL_INTERVAL = 1
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.static.StaticFilesMiddleware',
+    'core.middleware.metrics.MetricsMiddleware',
+    'core.middleware.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.query_budget.QueryBudgetMiddleware',
 ]
 
+# Fail requests that run more SQL queries than their view declares
+QUERY_BUDGET_ENABLED = DEBUG
+
+# Per-view request metrics served at /metrics. Worker processes sharing
+# METRICS_DIR are reported together
+METRICS_ENABLED = True
+METRICS_DIR = os.getenv('YATUBE_METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 5
+# Scrapers send "Authorization: Bearer <METRICS_TOKEN>" or connect from
+# METRICS_ALLOWED_IPS. Behind a reverse proxy every request comes from
+# the proxy address, so leave the list empty there and use the token
+METRICS_TOKEN = os.getenv('YATUBE_METRICS_TOKEN')
+METRICS_ALLOWED_IPS = [address.strip() for address in filter(None, os.getenv(
+    'YATUBE_METRICS_ALLOWED_IPS', '127.0.0.1,::1' if DEBUG else ''
+).split(','))]
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
@@ -74,6 +144,18 @@ TEMPLATES = [
     },
 ]
 
+# The production template profile keeps compiled templates in memory
+# and compiles all of them when the WSGI application starts
+TEMPLATE_PROFILE = os.getenv('YATUBE_TEMPLATE_PROFILE', 'default')
+if TEMPLATE_PROFILE == 'production':
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 # Database
@@ -86,6 +168,106 @@ DATABASES = {
     }
 }
 
+# Read replicas of the database, as comma separated SQLite file names
+REPLICA_DATABASES = []
+for number, name in enumerate(filter(None, os.getenv(
+    'YATUBE_DB_REPLICAS', ''
+).split(','))):
+    DATABASES[f'replica_{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, name.strip()),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# SQLite tuning picked by YATUBE_SQLITE_PROFILE. The production profile
+# lets readers and a writer run concurrently and keeps connections open
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+}
+SQLITE_PROFILE = os.getenv('YATUBE_SQLITE_PROFILE', 'default')
+SQLITE_PRAGMAS = SQLITE_PROFILES[SQLITE_PROFILE]
+if SQLITE_PROFILE == 'production':
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = 600
+
+# Reads stay on the primary this long after a client writes
+REPLICA_STICKY_SECONDS = 5
+
+# Sessions picked by YATUBE_SESSION_PROFILE. 'cached_db' reads sessions
+# from the 'sessions' cache and writes through to the database, 'cache'
+# keeps them in the cache only and 'signed_cookies' in the client cookie.
+# The 'sessions' cache is local memory, or files in
+# YATUBE_SESSION_CACHE_DIR to share it between development processes
+SESSION_PROFILES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_PROFILE = os.getenv('YATUBE_SESSION_PROFILE', 'db')
+SESSION_ENGINE = SESSION_PROFILES[SESSION_PROFILE]
+SESSION_CACHE_ALIAS = 'sessions'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+    },
+    'users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'users',
+    },
+    'feeds': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'feeds',
+    },
+}
+if os.getenv('YATUBE_SESSION_CACHE_DIR'):
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('YATUBE_SESSION_CACHE_DIR'),
+    }
+# Session users must be cached where every worker sees the same entry,
+# so the user cache is enabled only with a shared cache directory
+if os.getenv('YATUBE_USER_CACHE_DIR'):
+    CACHES['users'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('YATUBE_USER_CACHE_DIR'),
+    }
+
+# Writes purge cached feeds only in the cache they reach, so the feed
+# caches need a cache every worker shares; posts.E001 enforces it
+if os.getenv('YATUBE_FEED_CACHE_DIR'):
+    CACHES['feeds'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('YATUBE_FEED_CACHE_DIR'),
+    }
+FEED_CACHE_ALIAS = 'feeds'
+
+# Session users are loaded from the cache; ModelBackend stays listed so
+# sessions started before the switch keep working
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_ALIAS = 'users'
+USER_CACHE_ENABLED = not DEBUG and bool(os.getenv('YATUBE_USER_CACHE_DIR'))
+USER_CACHE_TIMEOUT = 60 * 5
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -121,3 +303,18 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+
+# The production static profile collects files under hashed names with
+# brotli and gzip variants into STATIC_ROOT and serves them from
+# StaticFilesMiddleware
+STATIC_PROFILE = os.getenv('YATUBE_STATIC_PROFILE', 'default')
+STATIC_SERVE = STATIC_PROFILE == 'production'
+if STATIC_SERVE:
+    STATIC_ROOT = os.getenv(
+        'YATUBE_STATIC_ROOT', os.path.join(BASE_DIR, 'collected_static')
+    )
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Static files without a hash in their name are cached this long
+STATIC_MAX_AGE = 60
+# Compressed variants saving less than this share of a file are dropped
+STATIC_COMPRESS_MIN_SAVING = 0.05